@@ -0,0 +1,80 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Local HTTP server standing in for API Gateway (and for CloudFormation's custom resource
+# ResponseURL). route_session() points a requests session's https:// traffic at it, so callers
+# keep building their real execute-api URLs.
+
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+import fakes
+
+requests_seen = Counter()
+
+ORDERS_BODY = b'["SUCCESS", {"order_id": "6472445C25D7", "pickup": "SFO", "dropoff": "SJC"}]'
+FORBIDDEN_BODY = b"{ 'message': Forbidden, 'workshopmsg': 'hit-apigw'}"
+# what the resource policy answers CallerOne/Two/Three; requested through the /denied resource
+DENIED_BODY = (b"{ 'message': User: anonymous is not authorized to perform: execute-api:Invoke on resource: "
+               b"arn:aws:execute-api:us-east-1:********8901:abcdef1234/api/GET/denied, 'workshopmsg': 'hit-apigw'}")
+MOCK_PUT_BODY = b"{'message':'SUCCESS Mock PUT'}"
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # send headers and body in one segment; otherwise delayed ACKs add ~40 ms to every keep-alive call
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def _reply(self, status, body, error_type=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if error_type:
+            self.send_header("x-amzn-ErrorType", error_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        requests_seen[f"GET {urlsplit(self.path).path}"] += 1
+        if self.headers.get("x-api-key") != fakes.API_KEY:
+            self._reply(403, FORBIDDEN_BODY, "ForbiddenException")
+        elif urlsplit(self.path).path.endswith("/denied"):
+            self._reply(403, DENIED_BODY, "AccessDeniedException")
+        else:
+            self._reply(200, ORDERS_BODY)
+
+    def do_PUT(self):
+        requests_seen[f"PUT {urlsplit(self.path).path}"] += 1
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._reply(200, MOCK_PUT_BODY)
+
+    def log_message(self, *args):
+        pass
+
+class Server(ThreadingHTTPServer):
+    # the default backlog of 5 drops connections (retried by TCP after 1 s) when many probes connect at once
+    request_queue_size = 128
+
+def start():
+    server = Server(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class LocalAdapter(HTTPAdapter):
+
+    def __init__(self, port, **kwargs):
+        self.port = port
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"http://127.0.0.1:{self.port}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+        return super().send(request, **kwargs)
+
+def route_session(session, server):
+    session.mount("https://", LocalAdapter(server.server_port))
@@ -0,0 +1,92 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Micro-benchmark: encoding a GET /orders body of N DynamoDB items (100k by default), comparing
+# the resource path the backend used to take (TypeDeserializer, then json.dumps, which needs a
+# `default` for Decimal/set/bytes) with ddb_json encoding the client's wire format directly.
+#
+#   pip install boto3
+#   python3 benchmarks/ddb_json_bench.py [-n 100000]
+#
+# "orders" items are all strings, like the seeded table; "mixed" items add numbers, a string
+# set, a binary attribute and a nested map.
+
+import argparse
+import base64
+import decimal
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "lambda", "backend"))
+
+from boto3.dynamodb.types import Binary, TypeDeserializer
+
+import ddb_json
+
+def make_items(n, mixed):
+    items = []
+    for i in range(n):
+        item = {"order_id": {"S": f"{i:012X}"}, "pickup": {"S": "SFO"}, "dropoff": {"S": "SJC"}}
+        if mixed:
+            item.update({
+                "price": {"N": f"{i % 1000}.25"},
+                "passengers": {"N": str(i % 4 + 1)},
+                "tags": {"SS": ["airport", "shared"]},
+                "receipt": {"B": i.to_bytes(8, "big")},
+                "route": {"M": {"stops": {"L": [{"S": "SFO"}, {"N": "2"}]}}},
+            })
+        items.append(item)
+    return items
+
+def default(value):
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, Binary):
+        return base64.b64encode(value.value).decode()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def encode_before(items):
+    deserializer = TypeDeserializer()
+    body = io.StringIO()
+    body.write('["SUCCESS"')
+    for item in items:
+        body.write(', ')
+        body.write(json.dumps({k: deserializer.deserialize(v) for k, v in item.items()}, default=default))
+    body.write(']')
+    return body.getvalue()
+
+def encode_after(items):
+    body = io.StringIO()
+    body.write('["SUCCESS"')
+    for item in items:
+        body.write(', ')
+        body.write(ddb_json.encode_item(item))
+    body.write(']')
+    return body.getvalue()
+
+def bench(name, encode, items):
+    start = time.perf_counter()
+    body = encode(items)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28}{len(items) / elapsed:>12,.0f} items/s   {elapsed * 1000:>8.1f} ms   {len(body) / 1e6:>6.1f} MB")
+    return elapsed, body
+
+def main():
+    parser = argparse.ArgumentParser(description="DynamoDB JSON encoding micro-benchmark")
+    parser.add_argument("-n", type=int, default=100000, help="items per payload")
+    args = parser.parse_args()
+
+    for kind in ("orders", "mixed"):
+        items = make_items(args.n, kind == "mixed")
+        print(f"\n{kind}: {args.n:,} items")
+        before, before_body = bench("TypeDeserializer+json.dumps", encode_before, items)
+        after, after_body = bench("ddb_json (wire format)", encode_after, items)
+        print(f"speedup: {before / after:.1f}x" + ("" if json.loads(before_body) == json.loads(after_body) else "   (outputs differ!)"))
+
+if __name__ == "__main__":
+    main()
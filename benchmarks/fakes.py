@@ -0,0 +1,238 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# In-process stand-ins for the AWS APIs used by the Lambdas and the scanner (SSM, Secrets Manager,
+# DynamoDB, Lambda, GuardDuty). install() swaps boto3's client/resource/Session factories for
+# these fakes, and every API call is counted in `calls` so benchmarks can report them.
+
+import bisect
+import io
+import json
+from collections import Counter
+
+import boto3
+import boto3.session
+from botocore.exceptions import ClientError
+
+calls = Counter()
+
+API_ID = "benchapi123"
+UNKNOWN_API_ID = "unknownapi1"
+API_KEY = "bench-api-key"
+SECRET_ARN = "arn:aws:secretsmanager:us-east-1:123456789012:secret:bench-secret"
+CALLER_ARN = "arn:aws:lambda:us-east-1:123456789012:function:bench-caller"
+INSTANCE_ID = "i-0123456789abcdef0"
+PARAMS_PATH = "/workshop/params/"
+
+# DynamoDB returns at most 1 MB per Scan; a fixed page size keeps pagination in play
+SCAN_PAGE_SIZE = 100
+
+parameters = {
+    f"{PARAMS_PATH}service-b-api-id": API_ID,
+    f"{PARAMS_PATH}service-b-api-secret-arn": SECRET_ARN,
+    f"{PARAMS_PATH}unknown-api-id": UNKNOWN_API_ID,
+    f"{PARAMS_PATH}service-a-unwanted-callers-list": f"{CALLER_ARN},{INSTANCE_ID}",
+}
+secrets = {SECRET_ARN: API_KEY}
+# SSM command ID -> the instances it was sent to
+commands = {}
+# instances SSM doesn't manage; SendCommand rejects any batch that names one of them
+unmanaged_instances = set()
+tables = {}
+_sorted_keys = {}
+
+def seed_orders(table_name, count):
+    tables[table_name] = {
+        f"{i:012X}": {"order_id": {"S": f"{i:012X}"}, "pickup": {"S": "SFO"}, "dropoff": {"S": "SJC"}}
+        for i in range(count)
+    }
+    _sorted_keys.pop(table_name, None)
+
+def _keys(table_name):
+    if table_name not in _sorted_keys:
+        _sorted_keys[table_name] = sorted(tables.get(table_name, {}))
+    return _sorted_keys[table_name]
+
+def _to_wire(value):
+    return {"S": value} if isinstance(value, str) else value
+
+def _from_wire(item):
+    return {k: v["S"] if "S" in v else v for k, v in item.items()}
+
+def _project(item, ProjectionExpression=None, ExpressionAttributeNames=None, **kwargs):
+    if not ProjectionExpression:
+        return item
+    names = [(ExpressionAttributeNames or {}).get(n.strip(), n.strip()) for n in ProjectionExpression.split(',')]
+    return {n: item[n] for n in names if n in item}
+
+class FakeClient:
+
+    def __init__(self, service, region_name=None, **kwargs):
+        self.service = service
+        self.meta = type("Meta", (), {"region_name": region_name or "us-east-1"})()
+
+    def _call(self, operation):
+        calls[f"{self.service}.{operation}"] += 1
+
+    def get_paginator(self, operation):
+        client = self
+
+        class Paginator:
+            def paginate(self, **kwargs):
+                yield getattr(client, operation)(**kwargs)
+        return Paginator()
+
+    # SSM
+    def get_parameter(self, Name, **kwargs):
+        self._call("GetParameter")
+        return {"Parameter": {"Name": Name, "Value": parameters[Name]}}
+
+    def get_parameters(self, Names, **kwargs):
+        self._call("GetParameters")
+        return {
+            "Parameters": [{"Name": n, "Value": parameters[n]} for n in Names if n in parameters],
+            "InvalidParameters": [n for n in Names if n not in parameters],
+        }
+
+    def get_parameters_by_path(self, Path, **kwargs):
+        self._call("GetParametersByPath")
+        return {"Parameters": [{"Name": n, "Value": v} for n, v in parameters.items() if n.startswith(Path)]}
+
+    def describe_instance_information(self, Filters=(), **kwargs):
+        self._call("DescribeInstanceInformation")
+        ids = [v for f in Filters if f["Key"] == "InstanceIds" for v in f["Values"]]
+        return {"InstanceInformationList": [
+            {"InstanceId": i, "PingStatus": "Online"} for i in ids if i not in unmanaged_instances
+        ]}
+
+    def send_command(self, InstanceIds, **kwargs):
+        self._call("SendCommand")
+        if unmanaged_instances.intersection(InstanceIds):
+            raise ClientError({"Error": {"Code": "InvalidInstanceId", "Message": "Instances not in a valid state for account"}}, "SendCommand")
+        command_id = f"bench-command-{len(commands)}"
+        commands[command_id] = list(InstanceIds)
+        return {"Command": {"CommandId": command_id}}
+
+    def list_command_invocations(self, CommandId, **kwargs):
+        self._call("ListCommandInvocations")
+        return {"CommandInvocations": [
+            {"InstanceId": i, "Status": "Success", "CommandPlugins": [{"Output": "ConnectTimeout"}]}
+            for i in commands.get(CommandId, [])
+        ]}
+
+    # Secrets Manager
+    def get_secret_value(self, SecretId, **kwargs):
+        self._call("GetSecretValue")
+        return {"SecretString": secrets[SecretId]}
+
+    # Lambda
+    def invoke(self, FunctionName, **kwargs):
+        self._call("Invoke")
+        payload = json.dumps('{"message":"User: anonymous is not authorized","workshopmsg":"hit-apigw"}')
+        return {"StatusCode": 200, "Payload": io.BytesIO(payload.encode())}
+
+    # DynamoDB (low-level, wire format)
+    def scan(self, TableName, ExclusiveStartKey=None, Segment=0, TotalSegments=1, Limit=None, **kwargs):
+        self._call("Scan")
+        keys = _keys(TableName)
+        if TotalSegments > 1:
+            keys = keys[Segment::TotalSegments]
+        start = 0
+        if ExclusiveStartKey:
+            start = bisect.bisect_right(keys, ExclusiveStartKey["order_id"]["S"])
+        page_size = min(Limit or SCAN_PAGE_SIZE, SCAN_PAGE_SIZE)
+        page = keys[start:start + page_size]
+        response = {"Items": [_project(tables[TableName][k], **kwargs) for k in page], "Count": len(page)}
+        if start + page_size < len(keys):
+            response["LastEvaluatedKey"] = {"order_id": {"S": page[-1]}}
+        return response
+
+    def get_item(self, TableName, Key, **kwargs):
+        self._call("GetItem")
+        item = tables.get(TableName, {}).get(Key["order_id"]["S"])
+        return {"Item": _project(item, **kwargs)} if item else {}
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        self._call("BatchGetItem")
+        responses = {}
+        for table_name, request in RequestItems.items():
+            table = tables.get(table_name, {})
+            responses[table_name] = [_project(table[k["order_id"]["S"]], **request)
+                                     for k in request["Keys"] if k["order_id"]["S"] in table]
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        self._call("BatchWriteItem")
+        for table_name, requests in RequestItems.items():
+            table = tables.setdefault(table_name, {})
+            for request in requests:
+                item = request["PutRequest"]["Item"]
+                table[item["order_id"]["S"]] = item
+            _sorted_keys.pop(table_name, None)
+        return {"UnprocessedItems": {}}
+
+    # GuardDuty
+    def list_detectors(self, **kwargs):
+        self._call("ListDetectors")
+        return {"DetectorIds": ["benchdetector"]}
+
+    def create_detector(self, **kwargs):
+        self._call("CreateDetector")
+        return {"DetectorId": "benchdetector"}
+
+    def create_sample_findings(self, **kwargs):
+        self._call("CreateSampleFindings")
+        return {}
+
+class FakeTable:
+    # boto3 resource Table over the same data, converting between wire format and plain values
+
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def scan(self, ExclusiveStartKey=None, **kwargs):
+        if ExclusiveStartKey:
+            ExclusiveStartKey = {k: _to_wire(v) for k, v in ExclusiveStartKey.items()}
+        response = self.client.scan(TableName=self.name, ExclusiveStartKey=ExclusiveStartKey, **kwargs)
+        response["Items"] = [_from_wire(i) for i in response["Items"]]
+        if "LastEvaluatedKey" in response:
+            response["LastEvaluatedKey"] = _from_wire(response["LastEvaluatedKey"])
+        return response
+
+    def get_item(self, Key, **kwargs):
+        response = self.client.get_item(TableName=self.name, Key={k: _to_wire(v) for k, v in Key.items()})
+        if "Item" in response:
+            response["Item"] = _from_wire(response["Item"])
+        return response
+
+class FakeResource:
+
+    def __init__(self, service, region_name=None, **kwargs):
+        self.client = FakeClient(service, region_name)
+
+    def Table(self, name):
+        return FakeTable(self.client, name)
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        request = {t: {"Keys": [{k: _to_wire(v) for k, v in key.items()} for key in r["Keys"]]}
+                   for t, r in RequestItems.items()}
+        response = self.client.batch_get_item(RequestItems=request)
+        response["Responses"] = {t: [_from_wire(i) for i in items] for t, items in response["Responses"].items()}
+        return response
+
+class FakeSession:
+
+    def __init__(self, region_name=None, **kwargs):
+        self.region_name = region_name or "us-east-1"
+
+    def client(self, service, region_name=None, **kwargs):
+        return FakeClient(service, region_name or self.region_name)
+
+    def resource(self, service, region_name=None, **kwargs):
+        return FakeResource(service, region_name or self.region_name)
+
+def install():
+    boto3.client = lambda service, region_name=None, **kwargs: FakeClient(service, region_name)
+    boto3.resource = lambda service, region_name=None, **kwargs: FakeResource(service, region_name)
+    boto3.session.Session = FakeSession
@@ -0,0 +1,115 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Runs a single benchmark target in this process against the fakes and the local API server,
+# and prints its measurements as one JSON object. Called by run.py, one fresh process per target.
+#
+#   python3 benchmarks/harness.py <target> [--iterations N] [--orders N]
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import targets
+
+class FakeContext:
+    function_name = "benchmark"
+    log_stream_name = "benchmark/log-stream"
+    aws_request_id = "benchmark-request"
+
+    def get_remaining_time_in_millis(self):
+        return 60000
+
+def build_event(target, server):
+    if target["event"] == "custom_resource":
+        return {
+            "RequestType": "Create",
+            "ResponseURL": f"http://127.0.0.1:{server.server_port}/cfn-response",
+            "StackId": "arn:aws:cloudformation:us-east-1:123456789012:stack/bench/1",
+            "RequestId": "bench-request",
+            "LogicalResourceId": "BenchResource",
+            "ResourceProperties": {},
+        }
+    return target["event"]
+
+def run(name, iterations, orders):
+    target = targets.TARGETS[name]
+    os.environ.update(targets.target_env(name))
+    sys.path[:0] = targets.target_path(name)
+    sys.argv = [target["module"] + ".py"]
+
+    import fakes
+    import api_server
+
+    fakes.install()
+    fakes.seed_orders(targets.TABLE_NAME, orders)
+    server = api_server.start()
+
+    module = importlib.import_module(target["module"])
+    if "http_client" in sys.modules:
+        api_server.route_session(sys.modules["http_client"].session, server)
+
+    entry = getattr(module, target["entry"])
+    event = build_event(target, server)
+    context = FakeContext()
+
+    def invoke():
+        with contextlib.redirect_stdout(io.StringIO()):
+            if target["event"] is None:
+                return entry()
+            return entry(event, context)
+
+    result = {"target": name}
+
+    fakes.calls.clear()
+    start = time.perf_counter()
+    invoke()
+    result["first_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    result["first_api_calls"] = sum(fakes.calls.values())
+
+    fakes.calls.clear()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        invoke()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    result["warm_p50_ms"] = round(statistics.median(latencies), 3)
+    result["warm_p90_ms"] = round(latencies[int(0.9 * (len(latencies) - 1))], 3)
+    result["warm_api_calls"] = round(sum(fakes.calls.values()) / iterations, 2)
+    result["warm_api_breakdown"] = {k: round(v / iterations, 2) for k, v in sorted(fakes.calls.items())}
+
+    # allocations are traced in a separate pass so tracing overhead stays out of the latencies
+    tracemalloc.start()
+    peaks = []
+    for _ in range(min(iterations, 10)):
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        invoke()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    result["peak_alloc_kib"] = round(statistics.median(peaks) / 1024, 1)
+
+    server.shutdown()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one benchmark target")
+    parser.add_argument("target", choices=sorted(targets.TARGETS))
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=1000, help="orders seeded into the fake table")
+    args = parser.parse_args()
+    print(json.dumps(run(args.target, args.iterations, args.orders)))
+
+if __name__ == "__main__":
+    main()
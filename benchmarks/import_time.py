@@ -0,0 +1,88 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Import-time report (python -X importtime) for every Lambda handler and the scanner, checked
+# against the per-target budgets in import_budget.json so cold-start regressions get caught.
+#
+#   python3 benchmarks/import_time.py             # report
+#   python3 benchmarks/import_time.py --check     # exit 1 if a target is over its budget
+#   python3 benchmarks/import_time.py --top 15 --targets caller_sigv4
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import targets
+
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_budget.json")
+
+IMPORT_SNIPPET = "import sys; sys.path[:0] = {path!r}; import {module}"
+
+def parse_importtime(stderr):
+    # lines look like "import time:  self [us] | cumulative | imported package", nesting shown by indentation
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+def measure(name, repeat):
+    # best of `repeat` fresh interpreters, to keep disk cache and scheduling noise out
+    target = targets.TARGETS[name]
+    env = dict(os.environ)
+    env.update(targets.target_env(name))
+    code = IMPORT_SNIPPET.format(path=targets.target_path(name), module=target["module"])
+    best = None
+    for _ in range(repeat):
+        stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env, cwd=targets.ROOT,
+                                check=True, capture_output=True, text=True).stderr
+        entries = parse_importtime(stderr)
+        total = next(c for n, d, s, c in reversed(entries) if n == target["module"] and d == 0)
+        if best is None or total < best[0]:
+            best = (total, entries)
+    total, entries = best
+    # direct dependencies of the target module, heaviest first
+    module_index = max(i for i, e in enumerate(entries) if e[0] == target["module"] and e[1] == 0)
+    start = module_index
+    while start > 0 and entries[start - 1][1] > 0:
+        start -= 1
+    direct = [e for e in entries[start:module_index] if e[1] == 1]
+    direct.sort(key=lambda e: e[3], reverse=True)
+    return total / 1000, direct
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time report and budget check")
+    parser.add_argument("--targets", nargs="+", choices=sorted(targets.TARGETS), default=list(targets.TARGETS))
+    parser.add_argument("--top", type=int, default=5, help="heaviest direct imports to list per target")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", default=BUDGET_FILE)
+    parser.add_argument("--check", action="store_true", help="exit 1 if a target exceeds its budget")
+    args = parser.parse_args()
+
+    with open(args.budget) as f:
+        budget = json.load(f)
+
+    over = []
+    for name in args.targets:
+        total_ms, direct = measure(name, args.repeat)
+        limit = budget.get(name)
+        status = "" if limit is None else (f"OVER budget {limit} ms" if total_ms > limit else f"budget {limit} ms")
+        print(f"{name:<18}{total_ms:>9.1f} ms   {status}")
+        for dep, _, _, cumulative_us in direct[:args.top]:
+            print(f"    {dep:<40}{cumulative_us / 1000:>9.1f} ms")
+        if limit is not None and total_ms > limit:
+            over.append(name)
+
+    if args.check and over:
+        print(f"\nover the import-time budget: {', '.join(over)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
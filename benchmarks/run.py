@@ -0,0 +1,147 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Offline benchmark suite for every Lambda handler and the scanner. No AWS account is needed:
+# AWS APIs are served by in-process fakes (fakes.py) and API Gateway by a local HTTP server
+# (api_server.py). For each target it reports cold import time, first and warm invocation
+# latency, peak allocations per invocation and AWS API calls per invocation.
+#
+#   pip install boto3 requests python-dotenv
+#   python3 benchmarks/run.py                          # print results
+#   python3 benchmarks/run.py --save                   # write benchmarks/baseline.json
+#   python3 benchmarks/run.py --compare                # fail on regressions against the baseline
+#                                                      # or import times over import_budget.json
+#   python3 benchmarks/run.py --targets backend scanner
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import targets
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+IMPORT_BUDGET = os.path.join(BENCH_DIR, "import_budget.json")
+
+# metrics compared against the baseline; all are lower-is-better
+TIMED_METRICS = ("import_ms", "warm_p50_ms", "peak_alloc_kib")
+COUNT_METRICS = ("first_api_calls", "warm_api_calls")
+
+# differences below these are treated as noise regardless of the relative tolerance
+NOISE_FLOOR = {"import_ms": 50, "warm_p50_ms": 5, "peak_alloc_kib": 16}
+
+IMPORT_SNIPPET = """
+import sys, time
+sys.path[:0] = {path!r}
+start = time.perf_counter()
+import {module}
+print((time.perf_counter() - start) * 1000)
+"""
+
+def target_env(name):
+    env = dict(os.environ)
+    env.update(targets.target_env(name))
+    return env
+
+def measure_import(name, repeat):
+    # each sample is a fresh interpreter, so this is the cold-start import cost
+    target = targets.TARGETS[name]
+    code = IMPORT_SNIPPET.format(path=targets.target_path(name), module=target["module"])
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], env=target_env(name), cwd=targets.ROOT,
+                                check=True, capture_output=True, text=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return round(min(samples), 2)
+
+def run_target(name, iterations, orders, import_repeat):
+    output = subprocess.run(
+        [sys.executable, os.path.join(BENCH_DIR, "harness.py"), name,
+         "--iterations", str(iterations), "--orders", str(orders)],
+        env=target_env(name), cwd=targets.ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["import_ms"] = measure_import(name, import_repeat)
+    return result
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    with open(IMPORT_BUDGET) as f:
+        import_budget = json.load(f)
+    for name, result in results.items():
+        if name in import_budget and result["import_ms"] > import_budget[name]:
+            regressions.append(f"{name}.import_ms: {result['import_ms']} over the {import_budget[name]} ms budget")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in TIMED_METRICS:
+            old, new = base.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > NOISE_FLOOR[metric]:
+                regressions.append(f"{name}.{metric}: {old} -> {new}")
+        for metric in COUNT_METRICS:
+            old, new = base.get(metric), result.get(metric)
+            if old is not None and new is not None and new > old:
+                regressions.append(f"{name}.{metric}: {old} -> {new}")
+    return regressions
+
+def print_table(results, baseline):
+    columns = ("import_ms", "first_ms", "warm_p50_ms", "warm_p90_ms", "peak_alloc_kib", "first_api_calls", "warm_api_calls")
+    print("target".ljust(18) + "".join(c.rjust(17) for c in columns))
+    for name, result in results.items():
+        cells = []
+        for c in columns:
+            cell = str(result.get(c, "-"))
+            old = baseline.get(name, {}).get(c)
+            if old not in (None, 0) and c in result:
+                cell += f" ({(result[c] - old) / old:+.0%})"
+            cells.append(cell.rjust(17))
+        print(name.ljust(18) + "".join(cells))
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("--targets", nargs="+", choices=sorted(targets.TARGETS), default=list(targets.TARGETS))
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=1000, help="orders seeded into the fake table")
+    parser.add_argument("--import-repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="exit 1 if a metric regressed against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="relative slack for timing/memory metrics")
+    parser.add_argument("--json", action="store_true", help="print raw JSON instead of a table")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {name: run_target(name, args.iterations, args.orders, args.import_repeat) for name in args.targets}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, baseline)
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nbaseline written to {args.baseline}")
+
+    if args.compare:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nregressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nno regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Micro-benchmark: SigV4 signatures/second for an execute-api GET, comparing the
+# per-request BotoAWSRequestsAuth the callers used to build with the cached SigV4Signer.
+#
+#   pip install boto3 requests aws-requests-auth
+#   python3 benchmarks/sigv4_bench.py [-n 5000]
+#
+# Runs offline with dummy credentials; nothing is sent over the network.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "lambda", "layer", "python"))
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "AKIDEXAMPLE")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "wJalrXUtnFEMI/K7MDENG+bPxrfiCYEXAMPLEKEY")
+os.environ.setdefault("AWS_SESSION_TOKEN", "benchmark-session-token")
+
+import requests
+
+import sigv4
+
+REGION = "us-east-1"
+HOST = f"abcdef1234.execute-api.{REGION}.amazonaws.com"
+URL = f"https://{HOST}/api/orders"
+
+def bench(name, make_auth, n):
+    request = requests.Request("GET", URL, headers={"x-api-key": "dummy"}).prepare()
+    start = time.perf_counter()
+    for _ in range(n):
+        make_auth()(request.copy())
+    elapsed = time.perf_counter() - start
+    print(f"{name:<34}{n / elapsed:>12,.0f} signatures/s   {elapsed / n * 1e6:>8.1f} us/signature")
+    return n / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="SigV4 signing micro-benchmark")
+    parser.add_argument("-n", type=int, default=5000, help="signatures per run")
+    args = parser.parse_args()
+
+    results = {}
+    try:
+        from aws_requests_auth.boto_utils import BotoAWSRequestsAuth
+        results["before"] = bench(
+            "BotoAWSRequestsAuth per request",
+            lambda: BotoAWSRequestsAuth(aws_host=HOST, aws_region=REGION, aws_service="execute-api"),
+            args.n,
+        )
+    except ImportError:
+        print("aws_requests_auth not installed; skipping the baseline")
+
+    signer = sigv4.SigV4Signer(REGION, "execute-api")
+    results["after"] = bench("SigV4Signer (cached)", lambda: signer, args.n)
+
+    if "before" in results:
+        print(f"\nspeedup: {results['after'] / results['before']:.1f}x")
+
+if __name__ == "__main__":
+    main()
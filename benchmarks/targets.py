@@ -0,0 +1,102 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# What the benchmark suite runs: one entry per Lambda handler plus the scanner.
+# "path" entries are relative to the repo root and are prepended to sys.path, the way the
+# Lambda runtime (function code + layer) or /tmp/workshop on the instance would see them.
+
+import os
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LAYER = "src/lambda/layer/python"
+PARAMS_PATH = "/workshop/params/"
+TABLE_NAME = "bench-orders"
+
+COMMON_ENV = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "AKIDEXAMPLE",
+    "AWS_SECRET_ACCESS_KEY": "wJalrXUtnFEMI/K7MDENG+bPxrfiCYEXAMPLEKEY",
+    "AWS_SESSION_TOKEN": "benchmark-session-token",
+}
+
+CALLER_ENV = {
+    "api_region": "us-east-1",
+    "api_resource": "orders",
+    "api_id_parameter": f"{PARAMS_PATH}service-b-api-id",
+    "api_secret_parameter": f"{PARAMS_PATH}service-b-api-secret-arn",
+}
+
+TARGETS = {
+    "backend": {
+        "path": ["src/lambda/backend", LAYER],
+        "module": "lambda_function",
+        "entry": "lambda_handler",
+        # the opt-in whole-table response, the heaviest path
+        "env": {"TABLE_NAME": TABLE_NAME, "CACHE_TTL": "0", "PAGE_SIZE": "0"},
+        "event": {"resource": "/orders", "httpMethod": "GET", "headers": {}},
+    },
+    # the default: one page of PAGE_SIZE orders
+    "backend_page": {
+        "path": ["src/lambda/backend", LAYER],
+        "module": "lambda_function",
+        "entry": "lambda_handler",
+        "env": {"TABLE_NAME": TABLE_NAME},
+        "event": {"resource": "/orders", "httpMethod": "GET", "headers": {}},
+    },
+    "caller_nosigv4": {
+        "path": ["src/lambda/caller_nosigv4", LAYER],
+        "module": "lambda_function",
+        "entry": "lambda_handler",
+        "env": CALLER_ENV,
+        "event": {"source": "aws.events"},
+    },
+    "caller_sigv4": {
+        "path": ["src/lambda/caller_sigv4", LAYER],
+        "module": "lambda_function",
+        "entry": "lambda_handler",
+        "env": CALLER_ENV,
+        "event": {"source": "aws.events"},
+    },
+    # a caller denied by the resource policy, like CallerOne/Two/Three: warm calls must stay at 0
+    "caller_denied": {
+        "path": ["src/lambda/caller_nosigv4", LAYER],
+        "module": "lambda_function",
+        "entry": "lambda_handler",
+        "env": dict(CALLER_ENV, api_resource="denied"),
+        "event": {"source": "aws.events"},
+    },
+    "ddbinit": {
+        "path": ["src/lambda/ddbinit", LAYER],
+        "module": "lambda_function",
+        "entry": "lambda_handler",
+        "env": {"TABLE_NAME": TABLE_NAME},
+        "event": "custom_resource",
+    },
+    "guardduty_helper": {
+        "path": ["src/lambda/guardduty_helper", LAYER],
+        "module": "lambda_function",
+        "entry": "lambda_handler",
+        "env": {"region": "us-east-1"},
+        "event": "custom_resource",
+    },
+    "scanner": {
+        "path": ["src/ec2/curl-pkg"],
+        "module": "scanner",
+        "entry": "main",
+        "env": dict(CALLER_ENV, **{
+            "unwanted_callers_parameter": f"{PARAMS_PATH}service-a-unwanted-callers-list",
+            "unknown_api_id_parameter": f"{PARAMS_PATH}unknown-api-id",
+            "scanner_ssm_poll_min": "0.001",
+            "params_path": PARAMS_PATH,
+        }),
+        "event": None,
+    },
+}
+
+def target_env(name):
+    env = dict(COMMON_ENV)
+    env.update(TARGETS[name]["env"])
+    return env
+
+def target_path(name):
+    return [os.path.join(ROOT, p) for p in TARGETS[name]["path"]]
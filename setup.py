@@ -23,6 +23,7 @@ setuptools.setup(
         "aws-cdk.core",
         "aws-cdk.aws-ec2",
         "aws-cdk.aws-s3",
+        "aws-cdk.aws-s3-assets",
         "aws-cdk.aws-lambda",
         "aws-cdk.aws-logs",
         "aws-cdk.aws-iam",
@@ -0,0 +1,61 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import re
+from collections import namedtuple
+
+import yaml
+
+# What a probe produced: HTTP status and headers when known, the (start of the) body, and the
+# exception type name when the call failed. Any field may be None.
+ProbeResult = namedtuple("ProbeResult", ["status", "headers", "body", "exception"])
+ProbeResult.__new__.__defaults__ = (None, None, None, None)
+
+DEFAULT_BODY_PREFIX = 4096
+
+class Rule:
+
+    def __init__(self, config):
+        self.verdict = config["verdict"]
+        self.enforced_at = config.get("enforced_at", "-")
+        status = config.get("status")
+        self.status = None if status is None else set(status if isinstance(status, list) else [status])
+        self.exception = re.compile(config["exception"]) if "exception" in config else None
+        body = config.get("body", [])
+        self.body = [re.compile(b) for b in (body if isinstance(body, list) else [body])]
+        self.headers = {k.lower(): re.compile(v) for k, v in config.get("headers", {}).items()}
+
+    def matches(self, result, body):
+        if self.status is not None and result.status not in self.status:
+            return False
+        if self.exception is not None and not (result.exception and self.exception.search(result.exception)):
+            return False
+        for pattern in self.body:
+            if not pattern.search(body):
+                return False
+        if self.headers:
+            headers = {k.lower(): v for k, v in (result.headers or {}).items()}
+            for name, pattern in self.headers.items():
+                if not pattern.search(headers.get(name, "")):
+                    return False
+        return True
+
+class Classifier:
+    # Rules are compiled once and evaluated in order against a bounded prefix of the body;
+    # the first matching rule gives the (verdict, enforced_at) pair.
+
+    def __init__(self, rules, body_prefix=DEFAULT_BODY_PREFIX):
+        self.rules = [Rule(r) for r in rules]
+        self.body_prefix = body_prefix
+
+    def classify(self, result):
+        body = (result.body or "")[:self.body_prefix]
+        for rule in self.rules:
+            if rule.matches(result, body):
+                return (rule.verdict, rule.enforced_at)
+        return ((body or result.exception or "")[:100], "unknown")
+
+def load(path):
+    with open(path) as f:
+        config = yaml.safe_load(f)["classifier"]
+    return Classifier(config["rules"], config.get("body_prefix", DEFAULT_BODY_PREFIX))
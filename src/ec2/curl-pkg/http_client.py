@@ -0,0 +1 @@
+../../lambda/layer/python/http_client.py
\ No newline at end of file
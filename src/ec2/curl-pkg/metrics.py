@@ -0,0 +1 @@
+../../lambda/layer/python/metrics.py
\ No newline at end of file
@@ -0,0 +1,71 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Machine-readable scan results: one JSON object (jsonl) or CSV row per probe, appended to a
+# file as soon as the probe completes and rotated by size, so it can be tailed by other tools.
+
+import csv
+import io
+import json
+import logging
+import os
+from logging.handlers import RotatingFileHandler
+
+FIELDS = ["timestamp", "caller", "check", "expectation", "verdict", "enforced_at", "latency_ms", "as_expected", "target"]
+FORMATS = ("jsonl", "csv")
+
+class _RotatingHandler(RotatingFileHandler):
+    # Every new file (the first one, and each one after a rollover) starts with the CSV header. An
+    # existing file with another header (e.g. written before `target` was added to FIELDS) is
+    # rotated first, or replaced when no backups are kept, so rows never land under the wrong columns.
+
+    def __init__(self, filename, header=None, **kwargs):
+        self.header = header
+        super().__init__(filename, mode='a', encoding='utf-8', delay=True, **kwargs)
+        if header and self._other_header():
+            if self.backupCount > 0:
+                self.doRollover()
+            else:
+                os.remove(self.baseFilename)
+        self.stream = self._open()
+
+    def _other_header(self):
+        try:
+            with open(self.baseFilename, encoding='utf-8') as f:
+                first_line = f.readline()
+        except FileNotFoundError:
+            return False
+        return bool(first_line) and first_line.rstrip('\r\n') != self.header
+
+    def _open(self):
+        stream = super()._open()
+        if self.header and stream.tell() == 0:
+            stream.write(self.header + self.terminator)
+            stream.flush()
+        return stream
+
+def _csv_line(values):
+    line = io.StringIO()
+    csv.writer(line, lineterminator='').writerow(values)
+    return line.getvalue()
+
+class ResultLog:
+
+    def __init__(self, path, output_format="jsonl", max_bytes=10 * 1024 * 1024, backup_count=5):
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown output format {output_format!r}, expected one of {FORMATS}")
+        self.output_format = output_format
+        header = _csv_line(FIELDS) if output_format == "csv" else None
+        self.handler = _RotatingHandler(path, header=header, maxBytes=max_bytes, backupCount=backup_count)
+
+    def write(self, record):
+        if self.output_format == "csv":
+            line = _csv_line(record.get(field) for field in FIELDS)
+        else:
+            line = json.dumps({field: record.get(field) for field in FIELDS})
+        # handle() takes the handler's lock, so probes finishing on different threads never
+        # interleave; every line is flushed as it's written
+        self.handler.handle(logging.makeLogRecord({"msg": line, "args": None}))
+
+    def close(self):
+        self.handler.close()
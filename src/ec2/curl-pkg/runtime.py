@@ -0,0 +1,180 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import threading
+import time
+
+import boto3
+import botocore.session
+from botocore.credentials import CredentialProvider, CredentialResolver, DeferredRefreshableCredentials
+from botocore.exceptions import ClientError
+
+# The scripts keep their settings in a .env file next to them. The scanner and the callers import
+# this module before any other workshop module, so it is loaded here, before http_client and metrics
+# read their settings at import.
+_ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+if os.path.exists(_ENV_FILE):
+    from dotenv import load_dotenv
+    load_dotenv(_ENV_FILE)
+
+import http_client
+import metrics
+
+# Shared by the scanner and the caller scripts: owns the boto3 session and its clients, and keeps the workshop's parameters (all under params_path, read with one
+# GetParametersByPath call) and the API key for params_ttl seconds.
+
+region = os.environ["api_region"]
+
+params_ttl = float(os.environ.get("params_ttl", 300))
+# a 403 for an invalid API key re-reads the parameters and secrets, at most once per this many seconds;
+# resource-policy denies never do
+refresh_min_interval = float(os.environ.get("refresh_min_interval", 60))
+
+# .env settings naming the parameters; read with GetParameters when params_path isn't set or allowed
+PARAMETER_SETTINGS = ("api_id_parameter", "api_secret_parameter", "unknown_api_id_parameter", "unwanted_callers_parameter")
+
+# assumed roles (scan targets in other accounts): session name and credential lifetime in seconds
+role_session_name = os.environ.get("role_session_name", "workshop-scanner")
+role_duration = int(os.environ.get("role_duration", 3600))
+
+class Runtime:
+
+    def __init__(self, region_name=None, params_path=None, ttl=None, session=None):
+        self.session = session or boto3.session.Session(region_name=region_name or region)
+        self.params_path = params_path if params_path is not None else os.environ.get("params_path")
+        # parameter names are the .env ones, moved under this path (e.g. another environment's)
+        self.prefix = self.params_path
+        self.ttl = params_ttl if ttl is None else ttl
+        # probes run on several threads; creating clients and refreshing the cache are serialized
+        self._lock = threading.RLock()
+        self._clients = {}
+        self._cache = {"expires": 0, "fetched": 0}
+
+    def client(self, service):
+        with self._lock:
+            if service not in self._clients:
+                self._clients[service] = self.session.client(service)
+            return self._clients[service]
+
+    def _fetch_parameters(self):
+        with metrics.span("ssm"):
+            return self._read_parameters()
+
+    def _read_parameters(self):
+        ssm = self.client('ssm')
+        values = {}
+        if self.params_path:
+            try:
+                for page in ssm.get_paginator('get_parameters_by_path').paginate(Path=self.params_path, Recursive=True):
+                    values.update((p['Name'], p['Value']) for p in page['Parameters'])
+                return values
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'AccessDeniedException':
+                    raise
+                # a role without ssm:GetParametersByPath still gets the named parameters
+                self.params_path = None
+
+        names = [self.parameter_name(s) for s in PARAMETER_SETTINGS if s in os.environ]
+        # GetParameters takes up to 10 names per call
+        for i in range(0, len(names), 10):
+            response = ssm.get_parameters(Names=names[i:i+10])
+            values.update((p['Name'], p['Value']) for p in response['Parameters'])
+        return values
+
+    def parameters(self, refresh=False):
+        # Returns ({name: value}, fetched) - fetched tells if the values were read from SSM just now
+        with self._lock:
+            if refresh or time.time() >= self._cache["expires"]:
+                values = self._fetch_parameters()
+                now = time.time()
+                self._cache = {"values": values, "secrets": {}, "fetched": now, "expires": now + self.ttl}
+                return self._cache["values"], True
+            return self._cache["values"], False
+
+    def get_parameter(self, setting, refresh=False):
+        # value of the parameter named by a .env setting, e.g. get_parameter("api_id_parameter")
+        return self._value(self.parameters(refresh)[0], setting)
+
+    def parameter_name(self, setting):
+        name = os.environ[setting]
+        default_prefix = os.environ.get("params_path")
+        if self.prefix and default_prefix and self.prefix != default_prefix and name.startswith(default_prefix):
+            return self.prefix + name[len(default_prefix):]
+        return name
+
+    def _value(self, values, setting):
+        name = self.parameter_name(setting)
+        if name not in values:
+            raise ValueError(f"Parameter not found: {name}")
+        return values[name]
+
+    def get_secret(self, secret_arn):
+        # kept, and dropped, along with the parameters
+        with self._lock:
+            self.parameters()
+            secrets = self._cache["secrets"]
+            if secret_arn not in secrets:
+                with metrics.span("secret"):
+                    secrets[secret_arn] = self.client('secretsmanager').get_secret_value(SecretId=secret_arn)["SecretString"]
+            return secrets[secret_arn]
+
+    def api_config(self, refresh=False):
+        # Returns (api_id, api_key, fetched) for ServiceB's API
+        with self._lock:
+            values, fetched = self.parameters(refresh)
+            api_id = self._value(values, "api_id_parameter")
+            api_key = self.get_secret(self._value(values, "api_secret_parameter"))
+            return api_id, api_key, fetched
+
+    def should_refresh(self, response, fetched):
+        # True when ServiceB rejected the cached API key (see http_client.invalid_api_key) and it
+        # wasn't read within refresh_min_interval
+        if fetched or not http_client.invalid_api_key(response):
+            return False
+        with self._lock:
+            return time.time() - self._cache["fetched"] >= refresh_min_interval
+
+default = Runtime()
+
+class _RoleCredentialProvider(CredentialProvider):
+    # hands botocore the shared, already created credentials of an assumed role
+    METHOD = "sts-assume-role"
+    CANONICAL_NAME = "workshop-assume-role"
+
+    def __init__(self, credentials):
+        super().__init__()
+        self.credentials = credentials
+
+    def load(self):
+        return self.credentials
+
+# role -> refreshable credentials, shared by every region the role is used in and kept for the
+# process' lifetime. STS is first called when a client needs them (so a role that can't be assumed
+# only fails its own target's probes), and again only when they are about to expire.
+_role_credentials = {}
+_role_lock = threading.Lock()
+
+def assume_role_session(role_arn, region_name, external_id=None):
+    key = (role_arn, external_id)
+    with _role_lock:
+        if key not in _role_credentials:
+            sts = default.client('sts')
+
+            def fetch():
+                kwargs = dict(RoleArn=role_arn, RoleSessionName=role_session_name, DurationSeconds=role_duration)
+                if external_id:
+                    kwargs["ExternalId"] = external_id
+                credentials = sts.assume_role(**kwargs)["Credentials"]
+                return {
+                    "access_key": credentials["AccessKeyId"],
+                    "secret_key": credentials["SecretAccessKey"],
+                    "token": credentials["SessionToken"],
+                    "expiry_time": credentials["Expiration"].isoformat(),
+                }
+
+            _role_credentials[key] = DeferredRefreshableCredentials(refresh_using=fetch, method="sts-assume-role")
+    session = botocore.session.Session()
+    # the session's only credential source is the role, instead of the default chain (env, instance profile, ...)
+    session.register_component("credential_provider", CredentialResolver([_RoleCredentialProvider(_role_credentials[key])]))
+    return boto3.session.Session(botocore_session=session, region_name=region_name)
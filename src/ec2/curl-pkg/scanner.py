@@ -1,21 +1,62 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import argparse
+import datetime
+import fcntl
 import json
+import random
+import signal
+import tempfile
+import threading
 import time
 import os
-import boto3
-from dotenv import load_dotenv
+from botocore.exceptions import ClientError
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
+import yaml
+
+# runtime first: it loads the .env the other modules read their settings from
+import runtime
+import classifier
+import metrics
+import result_log
 import service_a_caller
 import service_a_unknownapi
 
-load_dotenv()
+region = runtime.region
+
+# max number of probes running at the same time, per scanned environment
+max_workers = int(os.environ.get("scanner_max_workers", 16))
+
+# SSM polling interval bounds and per-instance deadline, in seconds
+ssm_poll_min = float(os.environ.get("scanner_ssm_poll_min", 0.5))
+ssm_poll_max = float(os.environ.get("scanner_ssm_poll_max", 4))
+ssm_deadline = float(os.environ.get("scanner_ssm_deadline", 60))
+
+# daemon mode: seconds between scans and random delay added to each scan
+scan_interval = float(os.environ.get("scanner_interval", 15))
+scan_jitter = float(os.environ.get("scanner_jitter", 2))
 
-region = os.environ["api_region"]
+# held while a scan runs, so a manual run, cron, and the daemon never scan at the same time
+lock_file = os.environ.get("scanner_lock_file", os.path.join(tempfile.gettempdir(), "workshop-scanner.lock"))
 
-boto3_session = boto3.session.Session(region_name=region)
-ssm_client = boto3_session.client('ssm')
+# machine-readable results (see --output-file); rotated once the file reaches output_max_bytes
+output_file = os.environ.get("scanner_output_file")
+output_format = os.environ.get("scanner_output_format", "jsonl")
+output_max_bytes = int(os.environ.get("scanner_output_max_bytes", 10 * 1024 * 1024))
+output_backup_count = int(os.environ.get("scanner_output_backup_count", 5))
+
+# print one CloudWatch EMF record per probe after each scan (see --emf and metrics.py)
+emf = os.environ.get("scanner_emf", "false").lower() in ("true", "1", "yes")
+
+# environments to scan (see --targets); without it, only the one described by .env
+targets_file = os.environ.get("scanner_targets_file")
+
+# rules that turn probe results into verdicts; see config.yml
+result_classifier = classifier.load(os.environ.get("scanner_config", os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.yml")))
+body_prefix = result_classifier.body_prefix
 
 # color codes to format the output
 GREEN = '\033[92m' 
@@ -27,111 +68,384 @@ BOLD = '\033[1m'
 CROSS = '\u2718'
 CHECK = '\u2714'
 
-def get_ssm_cmd(instance_id):
+# A scanned environment (a ServiceA/ServiceB pair) and the Runtime - session, clients, parameters - used to reach it
+Target = namedtuple("Target", ["name", "runtime"])
+
+# One probe: caller, expectation ("wanted"/"unwanted"), check label and target
+Probe = namedtuple("Probe", ["caller", "expected", "label", "target"])
+
+# targets are built once per process, so the daemon keeps their sessions, clients and cached parameters
+_targets = {}
+
+def load_targets(path):
+    # targets:
+    #   - {name: prod-use1, region: us-east-1, params_path: /workshop/params/}
+    #   - {name: test-euw1, region: eu-west-1, role_arn: arn:aws:iam::222222222222:role/Scanner, external_id: ...}
+    # Without role_arn a target uses the instance's own credentials; without params_path, the .env one.
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    targets = []
+    for entry in config.get("targets") or []:
+        key = tuple(sorted(entry.items()))
+        if key not in _targets:
+            target_region = entry.get("region", region)
+            if entry.get("role_arn"):
+                session = runtime.assume_role_session(entry["role_arn"], target_region, entry.get("external_id"))
+            else:
+                session = None
+            rt = runtime.Runtime(target_region, entry.get("params_path"), session=session)
+            _targets[key] = Target(entry.get("name") or f'{target_region}:{entry.get("role_arn", "local")}', rt)
+        targets.append(_targets[key])
+    if not targets:
+        raise ValueError(f"no targets in {path}")
+    if len({t.name for t in targets}) != len(targets):
+        raise ValueError(f"target names must be unique in {path}")
+    return targets
+
+def default_targets():
+    return [Target("default", runtime.default)]
+
+def get_ssm_cmds(instance_ids, rt=runtime.default):
+    # One command for all the instances (SendCommand takes up to 50 targets per call); results are
+    # collected by a single polling loop that backs off while nothing changes and gives up on an
+    # instance after ssm_deadline seconds. SendCommand rejects a whole batch for one unknown,
+    # stopped or unmanaged instance (without saying which), so each batch is first checked with
+    # DescribeInstanceInformation and only the instances whose SSM agent is online get the command.
     cmd1 = "python3 /tmp/workshop/service_a_caller_sigv4.py"
-    response = ssm_client.send_command(InstanceIds=[instance_id],
-                                DocumentName='AWS-RunShellScript',
-                                Parameters={"commands": [cmd1]}
-                                )
-    command_id = response.get('Command', {}).get("CommandId", None)
-    while True:
-        response = ssm_client.list_command_invocations(CommandId=command_id, Details=True)
-        if len(response['CommandInvocations']) == 0:
-            time.sleep(0.5)
-            continue
-        invocation = response['CommandInvocations'][0]
-        if invocation['Status'] not in ('Pending', 'InProgress', 'Cancelling'):
+    ssm_client = rt.client('ssm')
+    instance_ids = list(dict.fromkeys(instance_ids))
+    start = time.time()
+    command_ids = []
+    results = {}
+
+    def send(targets):
+        # an instance can still drop off between the check and the send; the rejected batch is
+        # then split in halves until the offending instances are isolated
+        try:
+            response = ssm_client.send_command(InstanceIds=targets,
+                                        DocumentName='AWS-RunShellScript',
+                                        Parameters={"commands": [cmd1]}
+                                        )
+            command_ids.append(response['Command']['CommandId'])
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'InvalidInstanceId':
+                raise
+            if len(targets) == 1:
+                results[targets[0]] = (f"InvalidInstanceId: {e.response['Error']['Message']}", time.time() - start)
+                return
+            middle = len(targets) // 2
+            send(targets[:middle])
+            send(targets[middle:])
+
+    paginator = ssm_client.get_paginator('describe_instance_information')
+    for i in range(0, len(instance_ids), 50):
+        batch = instance_ids[i:i+50]
+        ping_status = {}
+        for page in paginator.paginate(Filters=[{"Key": "InstanceIds", "Values": batch}]):
+            ping_status.update((info['InstanceId'], info['PingStatus']) for info in page['InstanceInformationList'])
+        online = [instance_id for instance_id in batch if ping_status.get(instance_id) == 'Online']
+        for instance_id in batch:
+            if instance_id not in online:
+                status = f"SSM agent {ping_status[instance_id]}" if instance_id in ping_status else "not managed by SSM"
+                results[instance_id] = (f"InvalidInstanceId: {status}", time.time() - start)
+        if online:
+            send(online)
+
+    delay = ssm_poll_min
+    while len(results) < len(instance_ids):
+        time.sleep(delay)
+        invocations = []
+        try:
+            paginator = ssm_client.get_paginator('list_command_invocations')
+            for command_id in command_ids:
+                for page in paginator.paginate(CommandId=command_id, Details=True):
+                    invocations.extend(page['CommandInvocations'])
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ThrottlingException':
+                raise
+
+        progressed = False
+        for invocation in invocations:
+            instance_id = invocation['InstanceId']
+            if instance_id in results or invocation['Status'] in ('Pending', 'InProgress', 'Cancelling'):
+                continue
+            # undeliverable/terminated invocations carry no plugin output, only their status
+            command_plugins = invocation['CommandPlugins']
+            output = command_plugins[-1]['Output'] if command_plugins else invocation['Status']
+            results[instance_id] = (output, time.time() - start)
+            progressed = True
+
+        elapsed = time.time() - start
+        if elapsed > ssm_deadline:
+            for instance_id in instance_ids:
+                if instance_id not in results:
+                    results[instance_id] = (f'TimedOut: no SSM result after {ssm_deadline}s', elapsed)
             break
-        time.sleep(0.5)
-    command_plugin = invocation['CommandPlugins'][-1]
-    output = command_plugin['Output']
-    return output
-
-def get_response(caller):
-    lambda_client = boto3_session.client('lambda')
-    response = lambda_client.invoke(
+        delay = ssm_poll_min if progressed else min(delay * 2, ssm_poll_max)
+    return results
+
+def get_response(caller, rt=runtime.default):
+    response = rt.client('lambda').invoke(
         FunctionName=caller
     )
-    payload = json.loads(response['Payload'].read())
-    return payload
-        
-def parse_result(response):
-    response = str(response)
-    if "SUCCESS" in response:
-        result = ("Allowed","-")
-    elif "not authorized" in response:
-        if "hit-apigw" in response:
-            result = ("Blocked","API Gateway")
+    # only a bounded prefix of the payload is read; a complete payload is JSON-decoded
+    raw = response['Payload'].read(body_prefix + 1)
+    try:
+        payload = json.loads(raw) if len(raw) <= body_prefix else raw.decode(errors='replace')
+    except ValueError:
+        payload = raw.decode(errors='replace')
+    if response.get('FunctionError') and isinstance(payload, dict):
+        return classifier.ProbeResult(body=payload.get('errorMessage'), exception=payload.get('errorType'))
+    return classifier.ProbeResult(body=payload if isinstance(payload, str) else json.dumps(payload))
+
+def http_result(response):
+    return classifier.ProbeResult(
+        status=response.status_code,
+        headers=response.headers,
+        body=response.content[:body_prefix].decode(errors='replace'),
+    )
+
+def exception_result(e):
+    # callers wrap request errors in SystemExit; classify the original exception
+    if isinstance(e, SystemExit) and isinstance(e.code, BaseException):
+        e = e.code
+    return classifier.ProbeResult(body=str(e)[:body_prefix], exception=type(e).__name__)
+
+def is_instance(caller):
+    return caller not in ("service_a_caller", "service_a_unknownapi") and caller[:3] != "arn"
+
+def probe(caller, ssm_batch=None, rt=runtime.default):
+    start = time.time()
+    try:
+        if caller == "service_a_caller":
+            result = http_result(service_a_caller.get_response(rt))
+        elif caller == "service_a_unknownapi":
+            result = http_result(service_a_unknownapi.get_response(rt))
+        elif is_instance(caller):
+            # instance probes share one batched SSM command; its own timing is reported instead
+            output, elapsed = ssm_batch.result()[caller]
+            return result_classifier.classify(classifier.ProbeResult(body=output)), elapsed
         else:
-            result = ("Blocked","VPC endpoint")
-    elif "Missing Authentication Token" in response:
-        result = ("Blocked","API Gateway")
-    elif "ConnectTimeout" in response:
-        result = ("Blocked","Security Group")
-    else:
-        result = (response[:100],"unknown")
-    
+            result = get_response(caller, rt)
+    # callers raise SystemExit on request errors; keep it as the probe's result rather than exiting the scan
+    except (Exception, SystemExit) as e:
+        result = exception_result(e)
+    return result_classifier.classify(result), time.time() - start
+
+def get_caller_type(caller):
+    if caller in ("service_a_caller", "service_a_unknownapi"):
+        return "local"
+    return "instance" if is_instance(caller) else "lambda"
+
+def measured_probe(entry, recorders, i, ssm_batch=None):
+    # probe() with the phases of its in-process calls (ssm, secret, sign, dns, connect, api) recorded
+    caller = entry.caller
+    recorder = metrics.Recorder("scanner", get_caller_type(caller))
+    with metrics.use(recorder):
+        result = probe(caller, ssm_batch, entry.target.runtime)
+    (verdict, enforced_at), elapsed = result
+    recorder.put("probe", round(elapsed * 1000, 3))
+    # an unclassified result's verdict is the start of its body, which doesn't belong in a dimension
+    recorder.set_dimensions(verdict=verdict if enforced_at != "unknown" else "unknown")
+    recorder.set_property("check", entry.label)
+    recorder.set_property("caller", caller)
+    recorder.set_property("target", entry.target.name)
+    recorders[i] = recorder
     return result
-def print_results(callers):
+
+def get_check_label(i, caller):
+    if caller == "service_a_caller":
+        return "Expected Caller"
+    elif caller == "service_a_unknownapi":
+        return "Expected Caller-Unknown API"
+    return f'Unwanted Caller #{i-1}'
+
+def is_expected(verdict, expected):
+    if expected == "wanted":
+        return verdict == "Allowed"
+    return verdict in ("Blocked", "Blocked?")
+
+def record_result(output, entry, future):
+    # runs on the probe's worker thread as soon as the probe is done, whatever the table's order
+    (verdict, enforced_at), elapsed = future.result()
+    output.write({
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='milliseconds'),
+        "caller": entry.caller,
+        "check": entry.label,
+        "expectation": entry.expected,
+        "verdict": verdict,
+        "enforced_at": enforced_at,
+        "latency_ms": round(elapsed * 1000, 1),
+        "as_expected": is_expected(verdict, entry.expected),
+        "target": entry.target.name,
+    })
+
+def print_row(row, expected):
+    longest_string = 24
+    line = '   '.join(str(x).ljust(longest_string + 4) for x in row)
+    if row[1] == "Allowed" and expected == "wanted":
+        print(GREEN+line+CHECK+ENDC)
+    elif row[1] == "Allowed" and expected == "unwanted":
+        print(FAIL+line+CROSS+ENDC)
+    elif row[1] == "Blocked" and expected == "wanted":
+        print(FAIL+line+CROSS+ENDC)
+    elif row[1] == "Blocked" and expected == "unwanted":
+        print(GREEN+line+CHECK+ENDC)
+    elif row[1] == "Blocked?" and expected == "wanted":
+        print(WARNING+line+CROSS+ENDC)
+    elif row[1] == "Blocked?" and expected == "unwanted":
+        print(GREEN+line+CHECK+ENDC)
+    
+    elif row[1] == "MEH":
+        print(WARNING+line+ENDC)
+    else:
+        print(OTHER+line+ENDC)
+
+def print_results(probes, output=None, emf=False):
 
     # Print result table's header
-    titles = ['check', 'result','enforced@']
+    titles = ['check', 'result', 'enforced@', 'time']
     #longest_string = max(map(len, checks))
     longest_string = 24
     line = '   '.join(str(x).ljust(longest_string + 4) for x in titles)
     print(BOLD+line+ENDC)
     print('-' * len(line))
-    
-    for i, caller in enumerate(callers):
-        if caller[0] == "service_a_caller":
-            check_label ="Expected Caller"
-            response = service_a_caller.main()
-        elif caller[0] == "service_a_unknownapi":
-            check_label ="Expected Caller-Unknown API"
-            response = service_a_unknownapi.main()
-        elif caller[0][:3] != "arn":
-            check_label = f'Unwanted Caller #{i-1}'
-            response = get_ssm_cmd(caller[0])
-        else:
-            check_label = f'Unwanted Caller #{i-1}'
-            response = get_response(caller[0])
-            
-        result = parse_result(response)
-
-        row = [
-            check_label,
-            result[0],
-            result[1]
-        ]
-
-        line = '   '.join(str(x).ljust(longest_string + 4) for x in row)
-        if row[1] == "Allowed" and caller[1] == "wanted":
-            print(GREEN+line+CHECK+ENDC)
-        elif row[1] == "Allowed" and caller[1] == "unwanted":
-            print(FAIL+line+CROSS+ENDC)
-        elif row[1] == "Blocked" and caller[1] == "wanted":
-            print(FAIL+line+CROSS+ENDC)
-        elif row[1] == "Blocked" and caller[1] == "unwanted":
-            print(GREEN+line+CHECK+ENDC)
-        elif row[1] == "Blocked?" and caller[1] == "wanted":
-            print(WARNING+line+CROSS+ENDC)
-        elif row[1] == "Blocked?" and caller[1] == "unwanted":
-            print(GREEN+line+CHECK+ENDC)
-        
-        elif row[1] == "MEH":
-            print(WARNING+line+ENDC)
+
+    # All probes, of every target, are fanned out at once; rows are still printed in the
+    # probes' order, each one as soon as it and the ones above it are done.
+    targets = list(dict.fromkeys(p.target for p in probes))
+    with ThreadPoolExecutor(max_workers=max_workers * len(targets)) as executor:
+        # one SSM command per target, submitted first so it always gets a worker before the probes waiting on it
+        ssm_batches = {}
+        for target in targets:
+            instance_ids = [p.caller for p in probes if p.target is target and is_instance(p.caller)]
+            if instance_ids:
+                ssm_batches[target] = executor.submit(get_ssm_cmds, instance_ids, target.runtime)
+        recorders = [None] * len(probes)
+        if emf:
+            futures = [executor.submit(measured_probe, p, recorders, i, ssm_batches.get(p.target))
+                       for i, p in enumerate(probes)]
         else:
-            print(OTHER+line+ENDC)
-def main():
-    unwanted_callers_str = ssm_client.get_parameter(Name=os.environ["unwanted_callers_parameter"])['Parameter']['Value']
-    unwanted_callers = unwanted_callers_str.split(",")
-    
+            futures = [executor.submit(probe, p.caller, ssm_batches.get(p.target), p.target.runtime) for p in probes]
+        if output is not None:
+            for entry, future in zip(probes, futures):
+                future.add_done_callback(lambda f, entry=entry: record_result(output, entry, f))
+
+        current = None
+        for entry, future in zip(probes, futures):
+            if len(targets) > 1 and entry.target is not current:
+                current = entry.target
+                print(f'{BOLD}> {current.name} ({current.runtime.session.region_name}){ENDC}')
+            result, elapsed = future.result()
+            row = [
+                entry.label,
+                result[0],
+                result[1],
+                f'{elapsed:.2f}s'
+            ]
+            print_row(row, entry.expected)
+
+    # after the table, so the records and the rows don't interleave
+    for recorder in recorders:
+        if recorder is not None:
+            recorder.flush()
+
+def get_unwanted_callers(rt=runtime.default):
+    # the parameters the probes need are read here too, in the same call, and reused for params_ttl seconds
+    return rt.get_parameter("unwanted_callers_parameter").split(",")
+
+def get_probes(target):
+    unwanted_callers = get_unwanted_callers(target.runtime)
+
     all_callers = [("service_a_caller","wanted")]
     all_callers.extend([("service_a_unknownapi","unwanted")])
     all_callers.extend([(c,"unwanted") for c in unwanted_callers ])
+    return [Probe(caller, expected, get_check_label(i, caller), target) for i, (caller, expected) in enumerate(all_callers)]
+
+def scan(output=None, emf=False, targets=None):
+    targets = targets or default_targets()
     print("\n> Started scanning ...\n")
-    print_results(all_callers)
-    print("\n> Finished scanning.\n")
+    start = time.time()
+
+    # every target's caller list is read at the same time; a target that can't be read is reported and skipped
+    probes = []
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        for target, future in zip(targets, [executor.submit(get_probes, t) for t in targets]):
+            try:
+                probes.extend(future.result())
+            except Exception as e:
+                print(f"{FAIL}> {target.name}: could not read its callers: {e!r}{ENDC}")
+    if probes:
+        print_results(probes, output, emf)
+    print(f"\n> Finished scanning in {time.time() - start:.2f}s.\n")
+
+def acquire_lock(blocking):
+    # read-only so users other than the lock file's owner (e.g. ssm-user vs. root) can lock it too
+    fd = os.open(lock_file, os.O_RDONLY | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+def run_daemon(interval, jitter, output=None, emf=False, targets=None):
+    # One long-running process scanning every `interval` seconds (plus up to `jitter`), reusing
+    # the same clients and sessions. Ticks missed because a scan ran long are skipped, not queued.
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda signum, frame: stop.set())
+
+    next_run = time.monotonic()
+    while not stop.wait(max(0, next_run - time.monotonic()) + random.uniform(0, jitter)):
+        lock = acquire_lock(blocking=False)
+        if lock is None:
+            print("> Another scan is still running, skipping this one.")
+        else:
+            try:
+                scan(output, emf, targets)
+            except Exception as e:
+                print(f"> Scan failed: {e!r}")
+            finally:
+                os.close(lock)
+
+        next_run += interval
+        now = time.monotonic()
+        if next_run < now:
+            next_run += ((now - next_run) // interval + 1) * interval
+    print("> Scanner stopped.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Probe the expected and unwanted callers of ServiceB's API.")
+    parser.add_argument("--daemon", action="store_true", help="keep running and scan on a schedule")
+    parser.add_argument("--interval", type=float, default=scan_interval, help="seconds between scans in daemon mode")
+    parser.add_argument("--jitter", type=float, default=scan_jitter, help="max random delay added to each scheduled scan")
+    parser.add_argument("--output-file", default=output_file, help="also append one record per probe to this file")
+    parser.add_argument("--output-format", choices=result_log.FORMATS, default=output_format, help="format of the --output-file records")
+    parser.add_argument("--max-bytes", type=int, default=output_max_bytes, help="rotate the output file once it reaches this size")
+    parser.add_argument("--backup-count", type=int, default=output_backup_count, help="number of rotated output files to keep")
+    parser.add_argument("--emf", action="store_true", default=emf, help="print a CloudWatch EMF record with the phase timings of each probe")
+    parser.add_argument("--targets", default=targets_file, help="YAML file listing the environments (region, role, parameter path) to scan")
+    args = parser.parse_args()
+
+    targets = load_targets(args.targets) if args.targets else None
+
+    output = None
+    if args.output_file:
+        output = result_log.ResultLog(args.output_file, args.output_format, args.max_bytes, args.backup_count)
+
+    try:
+        if args.daemon:
+            run_daemon(args.interval, args.jitter, output, args.emf, targets)
+        else:
+            lock = acquire_lock(blocking=True)
+            try:
+                scan(output, args.emf, targets)
+            finally:
+                os.close(lock)
+    finally:
+        if output is not None:
+            output.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
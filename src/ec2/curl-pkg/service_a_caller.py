@@ -1,37 +1,40 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
-from dotenv import load_dotenv
 import os
-import boto3
 import requests
 
-load_dotenv()
-region = os.environ["api_region"]
+# runtime first: it loads the .env the other modules read their settings from
+import runtime
+import http_client
+import metrics
 
-def call_api(api_id: str, api_key=None): 
-    host = api_id+'.execute-api.'+region+'.amazonaws.com'
+region = runtime.region
+
+def call_api(api_id: str, api_key=None, api_region=region): 
+    host = api_id+'.execute-api.'+api_region+'.amazonaws.com'
     base_url = f'https://{host}/api'
     get_url = f'{base_url}/{os.environ["api_resource"]}'
 
     try:
-        response = requests.get(get_url, headers={'x-api-key': api_key}, timeout=2)
+        with metrics.span("api"):
+            response = http_client.get(get_url, headers={'x-api-key': api_key})
     except requests.exceptions.RequestException as e:
         raise SystemExit(e)
     return response
 
-def main():
-    boto3_session = boto3.session.Session(region_name=region)
-
-    client = boto3_session.client('ssm')
-    api_id = client.get_parameter(Name=os.environ["api_id_parameter"])['Parameter']['Value']
-    api_secret_arn = client.get_parameter(Name=os.environ["api_secret_parameter"])['Parameter']['Value']
-
-    client = boto3_session.client('secretsmanager')
-    api_key = client.get_secret_value(SecretId=api_secret_arn)["SecretString"]
+def get_response(rt=runtime.default):
+    # rt: the Runtime (region, session, parameters) of the environment to call
+    api_id, api_key, fetched = rt.api_config()
+    response = call_api(api_id, api_key, rt.session.region_name)
+    # cached values may be stale (e.g. rotated secret); refresh once and retry, see Runtime.should_refresh
+    if rt.should_refresh(response, fetched):
+        api_id, api_key, _ = rt.api_config(refresh=True)
+        response = call_api(api_id, api_key, rt.session.region_name)
+    return response
 
-    response = call_api(api_id, api_key)
-    return response.text
+def main():
+    return get_response().text
 
 if __name__ == "__main__":
     print(main())
\ No newline at end of file
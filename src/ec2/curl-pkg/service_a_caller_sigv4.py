@@ -1,41 +1,43 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
-from dotenv import load_dotenv
 import os
-import boto3
 import requests
 
-load_dotenv()
-region = os.environ["api_region"]
+# runtime first: it loads the .env the other modules read their settings from
+import runtime
+import http_client
+import metrics
+import sigv4
+
+region = runtime.region
+
+# SigV4 signer reused for every call made by this process, with the shared session's credentials
+signer = sigv4.SigV4Signer(region, 'execute-api', runtime.default.session.get_credentials())
 
-# Simplifies making Amazon SigV4 calls with the python requests library
-from aws_requests_auth.boto_utils import BotoAWSRequestsAuth
 def call_api(api_id: str, api_key=None): 
     host = api_id+'.execute-api.'+region+'.amazonaws.com'
     base_url = f'https://{host}/api'
     get_url = f'{base_url}/{os.environ["api_resource"]}'
 
-    # Get authentication token - SigV4
-    auth = BotoAWSRequestsAuth(aws_host=host, aws_region=region, aws_service='execute-api')
     try:
-        response = requests.get(get_url, headers={'x-api-key': api_key}, timeout=2, auth=auth)
+        with metrics.span("api"):
+            response = http_client.get(get_url, headers={'x-api-key': api_key}, auth=signer)
     except requests.exceptions.RequestException as e:
         raise SystemExit(e)
     return response
 
-def main():
-    boto3_session = boto3.session.Session(region_name=region)
-
-    client = boto3_session.client('ssm')
-    api_id = client.get_parameter(Name=os.environ["api_id_parameter"])['Parameter']['Value']
-    api_secret_arn = client.get_parameter(Name=os.environ["api_secret_parameter"])['Parameter']['Value']
-
-    client = boto3_session.client('secretsmanager')
-    api_key = client.get_secret_value(SecretId=api_secret_arn)["SecretString"]
-
+def get_response():
+    api_id, api_key, fetched = runtime.default.api_config()
     response = call_api(api_id, api_key)
-    return response.text
+    # cached values may be stale (e.g. rotated secret); refresh once and retry, see Runtime.should_refresh
+    if runtime.default.should_refresh(response, fetched):
+        api_id, api_key, _ = runtime.default.api_config(refresh=True)
+        response = call_api(api_id, api_key)
+    return response
+
+def main():
+    return get_response().text
 
 if __name__ == "__main__":
     print(main())
\ No newline at end of file
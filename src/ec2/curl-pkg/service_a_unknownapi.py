@@ -1,32 +1,33 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
-from dotenv import load_dotenv
-import os
-import boto3
 import requests
 
-load_dotenv()
-region = os.environ["api_region"]
+# runtime first: it loads the .env the other modules read their settings from
+import runtime
+import http_client
+import metrics
 
-def call_api(api_id: str): 
-    host = api_id+'.execute-api.'+region+'.amazonaws.com'
+region = runtime.region
+
+def call_api(api_id: str, api_region=region): 
+    host = api_id+'.execute-api.'+api_region+'.amazonaws.com'
     base_url = f'https://{host}/api'
 
     try:
-        response = requests.put(base_url, timeout=2)
+        with metrics.span("api"):
+            response = http_client.put(base_url)
     except requests.exceptions.RequestException as e:
         raise SystemExit(e)
     return response
 
-def main():
-    boto3_session = boto3.session.Session(region_name=region)
+def get_response(rt=runtime.default):
+    api_id = rt.get_parameter("unknown_api_id_parameter")
 
-    client = boto3_session.client('ssm')
-    api_id = client.get_parameter(Name=os.environ["unknown_api_id_parameter"])['Parameter']['Value']
+    return call_api(api_id, rt.session.region_name)
 
-    response = call_api(api_id)
-    return response.text
+def main():
+    return get_response().text
 
 if __name__ == "__main__":
     print(main())
\ No newline at end of file
@@ -0,0 +1 @@
+../../lambda/layer/python/sigv4.py
\ No newline at end of file
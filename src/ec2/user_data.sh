@@ -1,8 +1,8 @@
 #!/bin/bash
-pip3 install aws-requests-auth boto3 python-dotenv
+pip3 install requests boto3 python-dotenv pyyaml
 cd /tmp
-# NOTE update with latest Event Engine S3 URL
-curl -O https://ee-assets-prod-us-east-1.s3.amazonaws.com/modules/1a656bee298f48fcad1bd4938e19b40a/v1/curl-pkg.zip
+# the scripts of src/ec2/curl-pkg, zipped from this repo; the stack fills in the S3 location
+aws s3 cp --region __CURL_PKG_REGION__ __CURL_PKG_S3_URL__ curl-pkg.zip
 unzip -qo curl-pkg.zip -d /tmp/workshop/
 chmod -R 777 /tmp/workshop/
 
@@ -11,8 +11,23 @@ touch /tmp/workshop/.env
 echo python3 /tmp/workshop/scanner.py > /usr/bin/runscanner
 chmod 755 /usr/bin/runscanner
 
-echo "* * * * * python3 /tmp/workshop/scanner.py > /dev/null 2>&1" >> /tmp/workshop/cron.txt
-echo "* * * * * python3 /tmp/workshop/scanner.py > /dev/null 2>&1" >> /tmp/workshop/cron.txt
-echo "* * * * * python3 /tmp/workshop/scanner.py > /dev/null 2>&1" >> /tmp/workshop/cron.txt
-echo "* * * * * python3 /tmp/workshop/scanner.py > /dev/null 2>&1" >> /tmp/workshop/cron.txt
-crontab /tmp/workshop/cron.txt
+# One long-running scanner (every 15s, same coverage as the former four per-minute cron jobs).
+# Installed here, enabled by the stack only on the instances that have the scanner's .env settings.
+# The colored table is discarded; every probe result is appended to /var/log/workshop-scanner/results.jsonl.
+mkdir -p /var/log/workshop-scanner
+cat > /etc/systemd/system/workshop-scanner.service <<'EOF'
+[Unit]
+Description=Zero Trust workshop scanner
+After=network-online.target
+
+[Service]
+WorkingDirectory=/tmp/workshop
+ExecStart=/usr/bin/python3 /tmp/workshop/scanner.py --daemon --interval 15 --jitter 2 --output-file /var/log/workshop-scanner/results.jsonl
+Restart=always
+RestartSec=10
+StandardOutput=null
+
+[Install]
+WantedBy=multi-user.target
+EOF
+systemctl daemon-reload
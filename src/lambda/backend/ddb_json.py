@@ -0,0 +1,45 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import base64
+from json.encoder import encode_basestring_ascii
+
+# JSON encoding of DynamoDB items as the low-level client returns them ({"attr": {"S": "..."}}),
+# without the TypeDeserializer round trip. Numbers are written exactly as DynamoDB stores them
+# (no Decimal or float), sets become arrays and binary values base64 strings. The output is
+# formatted like json.dumps with its default settings.
+
+def _binary(value):
+    # the client decodes binary attributes to bytes
+    return encode_basestring_ascii(base64.b64encode(value).decode())
+
+def _array(values, encode):
+    return '[' + ', '.join(map(encode, values)) + ']'
+
+_ENCODERS = {
+    'S': encode_basestring_ascii,
+    'N': str,
+    'BOOL': lambda value: 'true' if value else 'false',
+    'NULL': lambda value: 'null',
+    'B': _binary,
+    'SS': lambda values: _array(values, encode_basestring_ascii),
+    'NS': lambda values: _array(values, str),
+    'BS': lambda values: _array(values, _binary),
+    'L': lambda values: _array(values, encode_value),
+    'M': lambda value: encode_item(value),
+}
+
+def encode_value(value):
+    (kind, data), = value.items()
+    try:
+        encode = _ENCODERS[kind]
+    except KeyError:
+        raise TypeError(f"Unsupported DynamoDB type {kind!r}") from None
+    return encode(data)
+
+def encode_item(item):
+    try:
+        # fast path: every attribute is a string, as in the orders table
+        return '{' + ', '.join(encode_basestring_ascii(k) + ': ' + encode_basestring_ascii(v['S']) for k, v in item.items()) + '}'
+    except KeyError:
+        return '{' + ', '.join(encode_basestring_ascii(k) + ': ' + encode_value(v) for k, v in item.items()) + '}'
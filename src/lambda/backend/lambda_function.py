@@ -1,36 +1,330 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import base64
+import hashlib
+import io
 import json
 import os
-import boto3
-from botocore.exceptions import ClientError
+import queue
+import re
+import threading
+import time
+from botocore.exceptions import BotoCoreError, ClientError
+from concurrent.futures import ThreadPoolExecutor
+
+import aws_clients
+import ddb_json
+import metrics
 
 TABLE_NAME = os.environ['TABLE_NAME']
 
-def backend_logic(orders):
-    
-    response = orders
-    response.insert(0,"SUCCESS")
-    
+# number of parallel scan segments; 1 keeps the plain sequential scan
+SCAN_SEGMENTS = int(os.environ.get('SCAN_SEGMENTS', '1'))
+
+# BatchGetItem accepts up to 100 keys per call; unprocessed keys are retried with backoff
+BATCH_GET_SIZE = 100
+BATCH_GET_RETRIES = 5
+
+# seconds a warm container serves a GET /orders response (a page, or the whole table) from its
+# cached body and ETag, 304s included; 0 always re-scans the table
+CACHE_TTL = float(os.environ.get('CACHE_TTL', '0'))
+# responses kept per container, one per (limit, next_token, fields)
+MAX_CACHED_RESPONSES = 256
+
+# orders per GET /orders page when the client doesn't send `limit`. 0 is an explicit opt-in to the
+# whole table in one response (cached for CACHE_TTL). `limit` can't go over MAX_PAGE_SIZE.
+PAGE_SIZE = int(os.environ.get('PAGE_SIZE', '100'))
+MAX_PAGE_SIZE = 1000
+
+# ?fields=order_id,pickup returns only these attributes (a ProjectionExpression)
+MAX_FIELDS = 20
+FIELD_NAME = re.compile(r'^[A-Za-z0-9_-]{1,255}$')
+
+# (limit, next_token, fields) -> {"expires", "body", "etag", "headers"}; limit 0 is the whole table
+orders_cache = {}
+
+_DONE = object()
+
+# built on first use and kept for the container's lifetime; importing boto3 is deferred with it.
+# The low-level client returns items in wire format, which ddb_json encodes as they are; it is
+# also thread safe, so parallel scan segments share it, with a connection per segment.
+def get_dynamodb():
+    return aws_clients.client('dynamodb', max_pool_connections=max(aws_clients.POOL_SIZE, SCAN_SEGMENTS))
+
+def get_projection(fields):
+    # "order_id,pickup" -> ProjectionExpression kwargs; names go through placeholders since
+    # many (e.g. "status", "name") are DynamoDB reserved words. Raises ValueError if invalid.
+    if not fields:
+        return {}
+    names = list(dict.fromkeys(f.strip() for f in fields.split(',')))
+    if len(names) > MAX_FIELDS or not all(FIELD_NAME.match(n) for n in names):
+        raise ValueError(f'fields must be a comma-separated list of up to {MAX_FIELDS} attribute names')
+    return {
+        'ProjectionExpression': ', '.join(f'#f{i}' for i in range(len(names))),
+        'ExpressionAttributeNames': {f'#f{i}': n for i, n in enumerate(names)},
+    }
+
+def scan_pages(segment=0, total_segments=1, projection=None):
+    # Follows LastEvaluatedKey, yielding one page (up to 1 MB) of items at a time.
+    client = get_dynamodb()
+    kwargs = dict(projection or {})
+    if total_segments > 1:
+        kwargs.update(Segment=segment, TotalSegments=total_segments)
+    while True:
+        with metrics.span('dynamodb'):
+            response = client.scan(TableName=TABLE_NAME, **kwargs)
+        yield response['Items']
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def parallel_scan_pages(total_segments, projection=None):
+    # Each segment is scanned by its own worker; pages are handed over through a bounded
+    # queue so only a few pages are held in memory at any time.
+    pages = queue.Queue(maxsize=total_segments * 2)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def worker(segment):
+        try:
+            for page in scan_pages(segment, total_segments, projection):
+                put(page)
+                if stop.is_set():
+                    return
+        except Exception as e:
+            # any failure fails the whole scan; a missing segment must not pass for a complete table
+            put(e)
+        finally:
+            put(_DONE)
+
+    # created here, not by the first worker to need it
+    get_dynamodb()
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        for segment in range(total_segments):
+            executor.submit(worker, segment)
+        try:
+            running = total_segments
+            while running:
+                page = pages.get()
+                if page is _DONE:
+                    running -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield page
+        finally:
+            stop.set()
+
+def scan_page(limit, start_key=None, projection=None):
+    # Returns up to `limit` orders and the key to continue from, or None on the last page.
+    # A scan stops at 1 MB, so a page may take more than one call to fill.
+    client = get_dynamodb()
+    items = []
+    kwargs = dict(projection or {})
+    if start_key:
+        kwargs['ExclusiveStartKey'] = start_key
+    while len(items) < limit:
+        with metrics.span('dynamodb'):
+            response = client.scan(TableName=TABLE_NAME, Limit=limit - len(items), **kwargs)
+        items.extend(response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            return items, None
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return items, kwargs['ExclusiveStartKey']
+
+def encode_token(key):
+    key = {'order_id': key['order_id']['S']}
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_token(token):
+    # raises ValueError for anything that isn't a token we issued
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (TypeError, ValueError) as e:
+        raise ValueError("invalid next_token") from e
+    if not isinstance(key, dict) or set(key) != {'order_id'} or not isinstance(key['order_id'], str):
+        raise ValueError("invalid next_token")
+    return {'order_id': {'S': key['order_id']}}
+
+def get_orders(projection=None):
+    if SCAN_SEGMENTS > 1:
+        pages = parallel_scan_pages(SCAN_SEGMENTS, projection)
+    else:
+        pages = scan_pages(projection=projection)
+    for page in pages:
+        yield from page
+
+def get_order(order_id, projection=None):
+    with metrics.span('dynamodb'):
+        response = get_dynamodb().get_item(TableName=TABLE_NAME, Key={'order_id': {'S': order_id}}, **(projection or {}))
+    return response.get('Item')
+
+def batch_get_orders(order_ids, projection=None):
+    client = get_dynamodb()
+    # BatchGetItem rejects duplicate keys in the same request
+    order_ids = list(dict.fromkeys(order_ids))
+    for i in range(0, len(order_ids), BATCH_GET_SIZE):
+        keys = [{'order_id': {'S': order_id}} for order_id in order_ids[i:i+BATCH_GET_SIZE]]
+        request = {TABLE_NAME: dict(projection or {}, Keys=keys)}
+        for attempt in range(BATCH_GET_RETRIES + 1):
+            with metrics.span('dynamodb'):
+                response = client.batch_get_item(RequestItems=request)
+            yield from response['Responses'].get(TABLE_NAME, [])
+            request = response.get('UnprocessedKeys')
+            if not request:
+                break
+            if attempt == BATCH_GET_RETRIES:
+                raise RuntimeError(f"{len(request[TABLE_NAME]['Keys'])} keys still unprocessed after {BATCH_GET_RETRIES} retries")
+            time.sleep(0.05 * 2 ** attempt)
+
+def build_response(status_code, body, headers=None):
+    # gzip is applied by API Gateway (minimum_compression_size) for clients sending Accept-Encoding: gzip
     return {
-        'statusCode': 200,
+        'statusCode': status_code,
         'headers': {
-            'Content-Type': 'text/plain'
+            'Content-Type': 'application/json',
+            **(headers or {})
         },
-        'body': json.dumps(response)
+        'body': body
     }
 
-def lambda_handler(event, context):
+def get_header(event, name):
+    # API Gateway passes headers as sent by the client, so the lookup is case-insensitive
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+def etag_matches(if_none_match, etag):
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+def get_etag(body):
+    return '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+
+def conditional_response(event, body, etag, headers=None):
+    # a client that already has this body gets a 304
+    headers = dict(headers or {}, ETag=etag)
+    if etag_matches(get_header(event, 'if-none-match'), etag):
+        return build_response(304, '', headers)
+    return build_response(200, body, headers)
 
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table(TABLE_NAME)
+def cached_response(event, key, build):
+    # build() -> (body, headers) reads the table; while the cached response for `key` is fresh,
+    # repeated reads and matching If-None-Match are answered without it
+    entry = orders_cache.get(key)
+    if entry is None or time.time() >= entry["expires"]:
+        body, headers = build()
+        entry = {"expires": time.time() + CACHE_TTL, "body": body, "etag": get_etag(body), "headers": headers}
+        if CACHE_TTL > 0:
+            if len(orders_cache) >= MAX_CACHED_RESPONSES:
+                orders_cache.clear()
+            orders_cache[key] = entry
+    return conditional_response(event, entry["body"], entry["etag"], entry["headers"])
 
+def list_orders(event, projection):
+    params = event.get('queryStringParameters') or {}
+    if 'limit' in params or 'next_token' in params or PAGE_SIZE > 0:
+        return list_orders_page(event, params, projection)
+
+    return cached_response(event, (0, None, params.get('fields')),
+                           lambda: (backend_logic(get_orders(projection))['body'], {}))
+
+def list_orders_page(event, params, projection):
+    # GET /orders?limit=N&next_token=T - the token for the next page comes back in the
+    # X-Next-Token header, which is absent on the last page
+    try:
+        limit = int(params.get('limit') or PAGE_SIZE or MAX_PAGE_SIZE)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return build_response(400, json.dumps({'message': f'limit must be an integer between 1 and {MAX_PAGE_SIZE}'}))
     try:
-        response = table.scan()
+        start_key = decode_token(params['next_token']) if params.get('next_token') else None
+    except ValueError as e:
+        return build_response(400, json.dumps({'message': str(e)}))
+
+    def build():
+        items, last_key = scan_page(limit, start_key, projection)
+        headers = {'X-Next-Token': encode_token(last_key)} if last_key else {}
+        return backend_logic(items)['body'], headers
+
+    return cached_response(event, (limit, params.get('next_token'), params.get('fields')), build)
+
+def backend_logic(orders):
+
+    # The body is written item by item as the pages come in, rather than
+    # collecting the whole table into a list first.
+    body = io.StringIO()
+    body.write('[')
+    body.write(json.dumps("SUCCESS"))
+    for order in orders:
+        body.write(', ')
+        body.write(ddb_json.encode_item(order))
+    body.write(']')
+
+    return build_response(200, body.getvalue())
+
+def route(event):
+    try:
+        projection = get_projection((event.get('queryStringParameters') or {}).get('fields'))
+    except ValueError as e:
+        return build_response(400, json.dumps({'message': str(e)}))
+
+    resource = event.get('resource')
+    if resource == '/orders/{order_id}':
+        order = get_order(event['pathParameters']['order_id'], projection)
+        if order is None:
+            return build_response(404, json.dumps({'message': 'Order not found'}))
+        return backend_logic([order])
+
+    if resource == '/orders/batch':
+        # expects {"order_ids": ["...", ...]}
+        try:
+            order_ids = json.loads(event.get('body') or '{}')['order_ids']
+        except (ValueError, KeyError, TypeError):
+            order_ids = None
+        if not isinstance(order_ids, list) or not all(isinstance(i, str) for i in order_ids):
+            return build_response(400, json.dumps({'message': 'Request body must be {"order_ids": [<string>, ...]}'}))
+        return backend_logic(batch_get_orders(order_ids, projection))
+
+    return list_orders(event, projection)
+
+def get_caller_type(event):
+    # signed (IAM) requests carry the caller's identity
+    identity = (event.get('requestContext') or {}).get('identity') or {}
+    return 'sigv4' if identity.get('userArn') or identity.get('caller') else 'nosigv4'
+
+def handle(event):
+    try:
+        return route(event)
     except ClientError as e:
         print(e.response['Error']['Message'])
-    else:
-        orders = response['Items']
+        return build_response(500, json.dumps({'message': e.response['Error']['Message']}))
+    except (BotoCoreError, RuntimeError) as e:
+        # e.g. DynamoDB endpoint timeouts, or keys still unprocessed after the retries
+        print(e)
+        return build_response(503, json.dumps({'message': str(e)}))
 
-    return backend_logic(orders)
\ No newline at end of file
+def lambda_handler(event, context):
+
+    # phase timings go to the log as one EMF record per invocation, see metrics.py
+    metrics.start('backend', get_caller_type(event))
+    status = None
+    try:
+        with metrics.span('handler'):
+            response = handle(event)
+        status = response['statusCode']
+        return response
+    finally:
+        metrics.finish(metrics.status_verdict(status))
@@ -2,26 +2,53 @@
 # SPDX-License-Identifier: MIT-0
 
 import os
-import boto3
-import requests
+
+import api_config
+import fanout
+import http_client
+import loadgen
+import metrics
 
 region = os.environ["api_region"]
 
-def call_api(api_id: str, api_key=None): 
+def get_api_url(api_id: str):
     host = api_id+'.execute-api.'+region+'.amazonaws.com'
     base_url = f'https://{host}/api'
-    get_url = f'{base_url}/{os.environ["api_resource"]}'
+    return f'{base_url}/{os.environ["api_resource"]}'
+
+def call_api(api_id: str, api_key=None): 
+    get_url = get_api_url(api_id)
 
-    response = requests.get(get_url, headers={'x-api-key': api_key}, timeout=2)
+    with metrics.span("api"):
+        response = http_client.get(get_url, headers={'x-api-key': api_key})
     return response
 
-def lambda_handler(event, context):
-    client = boto3.client('ssm')
-    api_id = client.get_parameter(Name=os.environ["api_id_parameter"])['Parameter']['Value']
-    api_secret_arn = client.get_parameter(Name=os.environ["api_secret_parameter"])['Parameter']['Value']
+def handle(event, context):
+    # Returns (verdict, result); the verdict is the metrics dimension of the invocation
+    api_id, api_key, fetched = api_config.get_api_config()
+
+    # opt-in load test, e.g. {"load": {"rps": 20, "duration": 30, "concurrency": 8, "traffic": "mixed"}}
+    if isinstance(event, dict) and "load" in event:
+        return "load", loadgen.run(event["load"], get_api_url(api_id), api_key, region, "nosigv4", context)
 
-    client = boto3.client('secretsmanager')
-    api_key = client.get_secret_value(SecretId=api_secret_arn)["SecretString"]
+    # opt-in fan-out to several APIs/resources in one invocation, see fanout.py
+    if isinstance(event, dict) and "targets" in event:
+        return "fanout", fanout.run(event, api_key, region, api_config.get_parameters, False)
 
     response = call_api(api_id, api_key)
-    return response.text
\ No newline at end of file
+    # cached values may be stale (e.g. rotated secret); refresh once and retry, see api_config.py
+    if api_config.should_refresh(response, fetched):
+        api_id, api_key, _ = api_config.get_api_config(refresh=True)
+        response = call_api(api_id, api_key)
+    return metrics.status_verdict(response.status_code), response.text
+
+def lambda_handler(event, context):
+    # phase timings go to the log as one EMF record per invocation, see metrics.py
+    metrics.start("caller_nosigv4", "nosigv4")
+    verdict = "error"
+    try:
+        with metrics.span("handler"):
+            verdict, result = handle(event, context)
+        return result
+    finally:
+        metrics.finish(verdict)
\ No newline at end of file
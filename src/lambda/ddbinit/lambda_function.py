@@ -1,45 +1,51 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import json
 import os
-import boto3
 import cfnresponse
 
+import aws_clients
+import metrics
+import seeder
+
 TABLE_NAME = os.environ['TABLE_NAME']
 
-def lambda_handler(event, context):
+# threads writing batches; the Lambda's timeout bounds how many orders one Create can seed
+SEED_WORKERS = int(os.environ.get('SEED_WORKERS', '8'))
+
+def handle(event, context):
+    # Returns the CloudFormation response status
     if event['RequestType'] != "Create":
         responseData = {}
         cfnresponse.send(event, context, cfnresponse.SUCCESS, responseData)
-        return
-
-    dynamodb = boto3.client('dynamodb')
-
-    # putting mock data into DynamoDB
-    response = dynamodb.batch_write_item(
-        RequestItems={ 
-            TABLE_NAME : [ 
-                {
-                    "PutRequest": { 
-                        "Item": {"order_id": {"S":"6472445C25D7"}, "pickup": {"S":"SFO"}, "dropoff": {"S":"SJC"}}
-                    }
-                },
-                { 
-                    "PutRequest": { 
-                        "Item": { "order_id": {"S":"EDD052166486"},"pickup": {"S":"IAH"},"dropoff": {"S":"IAH"}}
-                    }
-                },
-                { 
-                    "PutRequest": { 
-                        "Item": {
-                            "order_id": {"S":"323E64AF67AB"},"pickup": {"S":"SEA"},"dropoff": {"S":"SFO"} }
-                    }
-                },                            
-            ]
-        },
-    )
-    
-    responseData = {}
+        return cfnresponse.SUCCESS
+
+    # putting mock data into DynamoDB: the 3 fixed orders plus SeedCount synthetic ones
+    # (CloudFormation passes the custom resource's properties as strings)
+    properties = event.get('ResourceProperties', {})
+    try:
+        with metrics.span("seed"):
+            # every worker gets a connection of the shared client
+            client = aws_clients.client('dynamodb', max_pool_connections=max(aws_clients.POOL_SIZE, SEED_WORKERS))
+            report = seeder.seed_orders(TABLE_NAME, int(properties.get('SeedCount', 0)), int(properties.get('Seed', 0)), SEED_WORKERS, client)
+    except Exception as e:
+        print(f"Seeding failed: {e!r}")
+        cfnresponse.send(event, context, cfnresponse.FAILED, {})
+        return cfnresponse.FAILED
+    print(json.dumps(report))
+
+    responseData = {"Items": report["items"]}
     cfnresponse.send(event, context, cfnresponse.SUCCESS, responseData)
 
-    return
\ No newline at end of file
+    return cfnresponse.SUCCESS
+
+def lambda_handler(event, context):
+    # phase timings go to the log as one EMF record per invocation, see metrics.py
+    metrics.start("ddbinit", "custom_resource")
+    status = "error"
+    try:
+        with metrics.span("handler"):
+            status = handle(event, context)
+    finally:
+        metrics.finish(status.lower())
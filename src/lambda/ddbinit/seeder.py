@@ -0,0 +1,158 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Loads the orders table with synthetic orders, for the custom resource (see lambda_function.py)
+# and from a workstation:
+#
+#   python3 seeder.py --table <OrdersTable> --count 100000 --seed 42 --workers 16
+#
+# The same count and seed always produce the same orders. Items are written with BatchWriteItem
+# (25 per call) by `workers` threads; unprocessed and throttled items are retried with exponential
+# backoff for as long as some of them keep getting written, so a table with little write capacity
+# slows the run down instead of failing it.
+
+# BatchWriteItem takes up to 25 put requests per call
+BATCH_SIZE = 25
+BACKOFF_BASE = 0.05
+BACKOFF_MAX = 5
+# a batch is given up on when none of its items could be written for this many seconds
+RETRY_TIMEOUT = 60
+# raised instead of returning UnprocessedItems when none of the batch could be written
+THROTTLING_ERRORS = ("ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded")
+
+# the workshop's original mock orders, written on every run so the walkthrough's examples keep working
+FIXED_ORDERS = [
+    {"order_id": {"S": "6472445C25D7"}, "pickup": {"S": "SFO"}, "dropoff": {"S": "SJC"}},
+    {"order_id": {"S": "EDD052166486"}, "pickup": {"S": "IAH"}, "dropoff": {"S": "IAH"}},
+    {"order_id": {"S": "323E64AF67AB"}, "pickup": {"S": "SEA"}, "dropoff": {"S": "SFO"}},
+]
+
+AIRPORTS = ["SFO", "SJC", "OAK", "LAX", "SAN", "SEA", "PDX", "IAH", "DFW", "ORD", "ATL", "JFK", "BOS", "DCA", "MIA", "DEN"]
+
+def generate_orders(count, seed=0):
+    # Yields `count` orders in DynamoDB wire format, with unique 12 hex digit IDs like the fixed ones
+    rng = random.Random(seed)
+    seen = {order["order_id"]["S"] for order in FIXED_ORDERS}
+    while len(seen) < count + len(FIXED_ORDERS):
+        order_id = f"{rng.getrandbits(48):012X}"
+        if order_id in seen:
+            continue
+        seen.add(order_id)
+        yield {"order_id": {"S": order_id}, "pickup": {"S": rng.choice(AIRPORTS)}, "dropoff": {"S": rng.choice(AIRPORTS)}}
+
+def chunks(items, size=BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def write_batch(client, table_name, batch, retry_timeout=RETRY_TIMEOUT):
+    # Returns the number of retries it took; raises RuntimeError if no item of the batch could be
+    # written for retry_timeout seconds
+    from botocore.exceptions import ClientError
+    request = {table_name: [{"PutRequest": {"Item": item}} for item in batch]}
+    pending = len(batch)
+    progressed = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            unprocessed = client.batch_write_item(RequestItems=request).get("UnprocessedItems")
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in THROTTLING_ERRORS:
+                raise
+            unprocessed = request
+        if not unprocessed:
+            return attempt
+        request = unprocessed
+        if len(request[table_name]) < pending:
+            pending = len(request[table_name])
+            progressed = time.monotonic()
+        elif time.monotonic() - progressed >= retry_timeout:
+            raise RuntimeError(f"{pending} items still unprocessed, none written for {retry_timeout}s ({attempt} retries)")
+        # full jitter, so throttled workers don't retry in lockstep
+        time.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** min(attempt, 10))))
+        attempt += 1
+
+def make_client(workers, region=None):
+    # botocore keeps 10 connections per client by default; every worker gets one
+    import boto3
+    from botocore.config import Config
+    return boto3.client('dynamodb', region_name=region, config=Config(max_pool_connections=max(10, workers)))
+
+def seed_orders(table_name, count, seed=0, workers=8, client=None, retry_timeout=RETRY_TIMEOUT):
+    # Writes the fixed orders plus `count` synthetic ones and returns a report of the run
+    if count < 0 or workers <= 0:
+        raise ValueError(f"invalid seeding settings: count={count}, workers={workers}")
+    if client is None:
+        client = make_client(workers)
+
+    lock = threading.Lock()
+    # bounds the batches waiting for a worker, so memory stays flat whatever the count
+    slots = threading.Semaphore(workers * 2)
+    stats = {"batches": 0, "retries": 0}
+    errors = []
+
+    def send(batch):
+        try:
+            retries = write_batch(client, table_name, batch, retry_timeout)
+            with lock:
+                stats["batches"] += 1
+                stats["retries"] += retries
+        except Exception as e:
+            with lock:
+                errors.append(e)
+        finally:
+            slots.release()
+
+    items = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in chunks(itertools.chain(FIXED_ORDERS, generate_orders(count, seed))):
+            slots.acquire()
+            # a failed batch stops the run; batches already submitted still finish
+            if errors:
+                break
+            items += len(batch)
+            executor.submit(send, batch)
+    elapsed = time.perf_counter() - start
+
+    if errors:
+        raise errors[0]
+    return {
+        "table": table_name,
+        "items": items,
+        "batches": stats["batches"],
+        "retries": stats["retries"],
+        "workers": workers,
+        "elapsed_s": round(elapsed, 3),
+        "items_per_s": round(items / elapsed, 1) if elapsed else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the orders table with synthetic orders.")
+    parser.add_argument("--table", required=True, help="name of the orders table")
+    parser.add_argument("--count", type=int, default=1000, help="number of synthetic orders, on top of the 3 fixed ones")
+    parser.add_argument("--seed", type=int, default=0, help="random seed; the same seed and count give the same orders")
+    parser.add_argument("--workers", type=int, default=8, help="number of threads writing batches")
+    parser.add_argument("--region", help="AWS region of the table (default: from the environment)")
+    parser.add_argument("--retry-timeout", type=float, default=RETRY_TIMEOUT,
+                        help="seconds a batch is retried without any of its items getting written")
+    args = parser.parse_args()
+
+    client = make_client(args.workers, args.region)
+    print(json.dumps(seed_orders(args.table, args.count, args.seed, args.workers, client, args.retry_timeout)))
+
+if __name__ == "__main__":
+    main()
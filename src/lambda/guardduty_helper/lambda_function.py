@@ -2,21 +2,27 @@
 # SPDX-License-Identifier: MIT-0
 
 import os
-import boto3
 import cfnresponse
 
+import aws_clients
+import metrics
+
 region = os.environ["region"]
 
-gd_client = boto3.client('guardduty',region_name=region)
+# only Create events use GuardDuty, so the client (and boto3) is loaded on first use
+def get_gd_client():
+    return aws_clients.client('guardduty', region_name=region)
 
-def lambda_handler(event, context):
+def handle(event, context):
 
     if event['RequestType'] != "Create":
         responseData = {}
         cfnresponse.send(event, context, cfnresponse.SUCCESS, responseData)
-        return
+        return cfnresponse.SUCCESS
             
-    detector=gd_client.list_detectors()
+    gd_client = get_gd_client()
+    with metrics.span("guardduty"):
+        detector=gd_client.list_detectors()
 
     if len(detector['DetectorIds']) <= 0:
         print('GuardDuty Detector does not exist in Region ' + region)
@@ -29,12 +35,23 @@ def lambda_handler(event, context):
     print('Detector exists in Region ' + region + ' Detector Id: ' + detector_id)
     for i in range(8):
         print('Creating sample finding ...')
-        response = gd_client.create_sample_findings(
-            DetectorId=detector_id,
-            FindingTypes=['PrivilegeEscalation:IAMUser/AnomalousBehavior']
-        )
+        with metrics.span("guardduty"):
+            response = gd_client.create_sample_findings(
+                DetectorId=detector_id,
+                FindingTypes=['PrivilegeEscalation:IAMUser/AnomalousBehavior']
+            )
 
     responseData = {}
     cfnresponse.send(event, context, cfnresponse.SUCCESS, responseData)
 
-    return
\ No newline at end of file
+    return cfnresponse.SUCCESS
+
+def lambda_handler(event, context):
+    # phase timings go to the log as one EMF record per invocation, see metrics.py
+    metrics.start("guardduty_helper", "custom_resource")
+    status = "error"
+    try:
+        with metrics.span("handler"):
+            status = handle(event, context)
+    finally:
+        metrics.finish(status.lower())
\ No newline at end of file
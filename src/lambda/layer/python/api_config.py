@@ -0,0 +1,61 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import time
+
+import aws_clients
+import http_client
+import metrics
+
+# API ID, secret ARN and API key of ServiceB, shared by the caller Lambdas. They are kept for the
+# lifetime of a warm container, up to cache_ttl seconds. A 403 for an invalid API key (e.g. a
+# rotated secret) refreshes them, at most once per refresh_min_interval seconds; a 403 from the
+# resource policy (CallerOne/Two/Three are denied by design) never does.
+
+CACHE_TTL = float(os.environ.get("cache_ttl", "300"))
+REFRESH_MIN_INTERVAL = float(os.environ.get("refresh_min_interval", "60"))
+
+cache = {"expires": 0, "fetched": 0}
+
+def get_api_config(refresh=False):
+    # Returns (api_id, api_key, fetched) - fetched tells if the values came from SSM/Secrets Manager just now
+    if not refresh and time.time() < cache["expires"]:
+        return cache["api_id"], cache["api_key"], False
+
+    # boto3 is only needed when the cache is cold; aws_clients imports it with the first client
+    names = [os.environ["api_id_parameter"], os.environ["api_secret_parameter"]]
+    with metrics.span("ssm"):
+        response = aws_clients.client('ssm').get_parameters(Names=names)
+    if response['InvalidParameters']:
+        raise ValueError(f"Parameters not found: {response['InvalidParameters']}")
+    params = {p['Name']: p['Value'] for p in response['Parameters']}
+
+    cache["api_id"] = params[os.environ["api_id_parameter"]]
+    cache["secret_arn"] = params[os.environ["api_secret_parameter"]]
+    with metrics.span("secret"):
+        cache["api_key"] = aws_clients.client('secretsmanager').get_secret_value(SecretId=cache["secret_arn"])["SecretString"]
+    cache["params"] = dict(params)
+    cache["fetched"] = time.time()
+    cache["expires"] = cache["fetched"] + CACHE_TTL
+    return cache["api_id"], cache["api_key"], True
+
+def get_parameters(names):
+    # Values of any parameters (e.g. the fan-out targets' API IDs); the ones not cached yet are
+    # read with one GetParameters call per 10 names and kept as long as the API config
+    params = cache["params"]
+    missing = [n for n in names if n not in params]
+    for i in range(0, len(missing), 10):
+        with metrics.span("ssm"):
+            response = aws_clients.client('ssm').get_parameters(Names=missing[i:i+10])
+        if response['InvalidParameters']:
+            raise ValueError(f"Parameters not found: {response['InvalidParameters']}")
+        params.update((p['Name'], p['Value']) for p in response['Parameters'])
+    return {n: params[n] for n in names}
+
+def should_refresh(response, fetched):
+    # True when the cached API key was rejected (see http_client.invalid_api_key) and wasn't
+    # fetched within refresh_min_interval
+    if fetched or not http_client.invalid_api_key(response):
+        return False
+    return time.time() - cache["fetched"] >= REFRESH_MIN_INTERVAL
@@ -0,0 +1,57 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import threading
+
+# boto3 clients shared by all the workshop's Lambdas. client("ssm") returns the same client for
+# the life of the container, so warm invocations reuse its connections, and every client gets the
+# same tuned botocore settings (pool size, retries, timeouts, TCP keepalive) from the environment
+# instead of botocore's defaults (10 connections, legacy retries, 60 s timeouts, no keepalive).
+# boto3 is only imported when the first client is built.
+
+POOL_SIZE = int(os.environ.get("aws_client_pool_size", "10"))
+# "adaptive" adds client-side rate limiting on throttling errors to the "standard" retries
+RETRY_MODE = os.environ.get("aws_client_retry_mode", "adaptive")
+# retries after the first attempt (botocore's max_attempts)
+MAX_ATTEMPTS = int(os.environ.get("aws_client_max_attempts", "3"))
+CONNECT_TIMEOUT = float(os.environ.get("aws_client_connect_timeout", "2"))
+READ_TIMEOUT = float(os.environ.get("aws_client_read_timeout", "10"))
+TCP_KEEPALIVE = os.environ.get("aws_client_tcp_keepalive", "true").lower() not in ("false", "0", "no")
+
+_lock = threading.Lock()
+_session = None
+_clients = {}
+
+def get_config(**overrides):
+    # overrides are botocore Config options, e.g. max_pool_connections for a parallel scan
+    from botocore.config import Config
+    settings = dict(
+        max_pool_connections=POOL_SIZE,
+        retries={"mode": RETRY_MODE, "max_attempts": MAX_ATTEMPTS},
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        tcp_keepalive=TCP_KEEPALIVE,
+    )
+    settings.update(overrides)
+    try:
+        return Config(**settings)
+    except TypeError:
+        # botocore < 1.27 has no tcp_keepalive option
+        settings.pop("tcp_keepalive")
+        return Config(**settings)
+
+def client(service, region_name=None, **overrides):
+    # One client per (service, region, overrides); creating clients isn't thread safe, so it's serialized
+    global _session
+    key = (service, region_name, tuple(sorted(overrides.items())))
+    cached = _clients.get(key)
+    if cached is not None:
+        return cached
+    with _lock:
+        if key not in _clients:
+            if _session is None:
+                import boto3
+                _session = boto3.session.Session()
+            _clients[key] = _session.client(service, region_name=region_name, config=get_config(**overrides))
+        return _clients[key]
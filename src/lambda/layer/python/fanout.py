@@ -0,0 +1,90 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+import loadgen
+
+# Fan-out mode for the caller Lambdas: one invocation calls several APIs/resources concurrently
+# on a pool of `concurrency` threads and returns each target's status and latency.
+#
+# Invocation event:
+#   {"targets": [
+#       {"api_id_parameter": "/workshop/params/service-b-api-id", "resource": "orders", "method": "GET", "sigv4": true},
+#       {"api_id_parameter": "/workshop/params/unknown-api-id", "resource": "", "method": "PUT", "api_key": false}
+#    ],
+#    "concurrency": 8}
+# sigv4 defaults to the caller's own type and api_key (send the ServiceB API key) to true.
+
+METHODS = ("GET", "HEAD", "PUT", "POST", "DELETE", "PATCH", "OPTIONS")
+MAX_TARGETS = 100
+DEFAULT_CONCURRENCY = 8
+
+# how much of each response body is returned
+BODY_PREFIX = 256
+
+def parse_targets(event, default_sigv4):
+    targets = event.get("targets")
+    if not isinstance(targets, list) or not 0 < len(targets) <= MAX_TARGETS:
+        raise ValueError(f"targets must be a list of 1 to {MAX_TARGETS} targets")
+    parsed = []
+    for target in targets:
+        if not isinstance(target, dict) or not isinstance(target.get("api_id_parameter"), str):
+            raise ValueError(f"invalid target (api_id_parameter is required): {target}")
+        method = str(target.get("method", "GET")).upper()
+        if method not in METHODS:
+            raise ValueError(f"invalid method {method!r} in target {target}")
+        parsed.append({
+            "api_id_parameter": target["api_id_parameter"],
+            "resource": str(target.get("resource", "")).strip("/"),
+            "method": method,
+            "sigv4": bool(target.get("sigv4", default_sigv4)),
+            "api_key": bool(target.get("api_key", True)),
+        })
+    return parsed
+
+def build_url(api_id, resource, region):
+    url = f'https://{api_id}.execute-api.{region}.amazonaws.com/api'
+    return f'{url}/{resource}' if resource else url
+
+def call_all(targets, api_key, region, concurrency):
+    # requests is blocking, so the calls run on `concurrency` worker threads; results keep the targets' order
+    signer = loadgen.get_signer(region) if any(t["sigv4"] for t in targets) else None
+
+    def call(target):
+        headers = {'x-api-key': api_key} if target["api_key"] else {}
+        start = time.perf_counter()
+        try:
+            response = http_client.request(target["method"], target["url"], headers=headers,
+                                           auth=signer if target["sigv4"] else None)
+            result = {"status": response.status_code, "body": response.text[:BODY_PREFIX]}
+        except Exception as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return dict(target, **result)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(call, targets))
+
+def run(event, api_key, region, get_parameters, default_sigv4):
+    # get_parameters(names) -> {name: value} resolves the targets' API IDs, in one call
+    targets = parse_targets(event, default_sigv4)
+    concurrency = int(event.get("concurrency", DEFAULT_CONCURRENCY))
+    if concurrency <= 0:
+        raise ValueError(f"invalid concurrency: {concurrency}")
+    concurrency = min(concurrency, len(targets))
+
+    api_ids = get_parameters(list(dict.fromkeys(t["api_id_parameter"] for t in targets)))
+    for target in targets:
+        target["url"] = build_url(api_ids[target["api_id_parameter"]], target["resource"], region)
+
+    http_client.ensure_pool_size(concurrency)
+    start = time.perf_counter()
+    results = call_all(targets, api_key, region, concurrency)
+    return {
+        "concurrency": concurrency,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        "results": results,
+    }
@@ -0,0 +1,155 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import socket
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+
+import metrics
+
+# Shared HTTP client for calls to the execute-api endpoint. One module-level session keeps
+# connections to the VPC endpoint alive between calls (and between warm invocations),
+# so the TCP+TLS handshake is only paid when a new connection is opened.
+
+CONNECT_TIMEOUT = float(os.environ.get("connect_timeout", "2"))
+READ_TIMEOUT = float(os.environ.get("read_timeout", "2"))
+TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+# retries for idempotent GETs on connection/read errors; 0 disables
+GET_RETRIES = int(os.environ.get("get_retries", "0"))
+
+# connections kept per host; loadgen and fanout grow it to their concurrency (ensure_pool_size)
+POOL_SIZE = int(os.environ.get("http_pool_size", "10"))
+
+# seconds to keep resolved execute-api addresses; 0 disables the cache
+DNS_TTL = float(os.environ.get("dns_ttl", "60"))
+
+# (host, port) -> (expires, [addresses]). Only connections opened by this module's session use it;
+# socket.getaddrinfo is left alone, so boto3 and everything else resolve as usual.
+_dns_cache = {}
+
+def _resolve(host, port):
+    entry = _dns_cache.get((host, port))
+    if entry and entry[0] > time.time():
+        return entry[1]
+    with metrics.span("dns"):
+        infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    _dns_cache[(host, port)] = (time.time() + DNS_TTL, addresses)
+    return addresses
+
+def _get_retry():
+    # read=False re-raises a read timeout as is (requests.ReadTimeout) instead of counting it; with
+    # read retries the exhausted timeout is turned back into ReadTimeout by _TimedAdapter.send
+    kwargs = dict(total=GET_RETRIES, connect=GET_RETRIES, read=GET_RETRIES or False, status=0,
+                  backoff_factor=0.1, raise_on_status=False)
+    try:
+        return Retry(allowed_methods=frozenset(["GET"]), **kwargs)
+    except TypeError:
+        # urllib3 < 1.26
+        return Retry(method_whitelist=frozenset(["GET"]), **kwargs)
+
+class _CachedDNSConnection:
+    # Opens the socket to a cached address of the execute-api host. urllib3 connects to _dns_host
+    # and keeps using `host` for the Host header, SNI and certificate checks, so only the lookup is
+    # skipped. When none of the cached addresses accepts a connection (e.g. the VPC endpoint's
+    # network interfaces changed) the entry is dropped and the next connection resolves again.
+
+    def _new_conn(self):
+        host = self._dns_host
+        if DNS_TTL <= 0 or '.execute-api.' not in host:
+            return super()._new_conn()
+        try:
+            addresses = _resolve(host, self.port)
+        except socket.gaierror:
+            # resolved again by urllib3, which raises its own error for the failure
+            return super()._new_conn()
+        error = None
+        for address in addresses:
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except Exception as e:
+                error = e
+            finally:
+                self._dns_host = host
+        _dns_cache.pop((host, self.port), None)
+        raise error
+
+# New connections are timed as the "connect" phase (TCP + TLS handshake; includes the DNS lookup
+# when it isn't cached), so a slow call can be told apart from a slow handshake.
+class _TimedHTTPConnection(_CachedDNSConnection, HTTPConnection):
+    def connect(self):
+        with metrics.span("connect"):
+            super().connect()
+
+class _TimedHTTPSConnection(_CachedDNSConnection, HTTPSConnection):
+    def connect(self):
+        with metrics.span("connect"):
+            super().connect()
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class _TimedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+    def send(self, request, **kwargs):
+        # requests reports retries exhausted on read timeouts as ConnectionError("Max retries exceeded")
+        try:
+            return super().send(request, **kwargs)
+        except requests.ConnectionError as e:
+            reason = getattr(e.args[0], "reason", None) if e.args else None
+            if isinstance(reason, ReadTimeoutError):
+                raise requests.ReadTimeout(e, request=request) from e
+            raise
+
+session = requests.Session()
+_adapter = _TimedAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=_get_retry())
+session.mount("https://", _adapter)
+session.mount("http://", _adapter)
+_pool_lock = threading.Lock()
+
+def ensure_pool_size(size):
+    # Grows the pool to `size` connections per host for callers with that many requests in flight
+    # (loadgen, fanout); otherwise the extra connections would be opened and dropped on every call.
+    # The pools are rebuilt, so idle connections are closed once, when the size grows.
+    with _pool_lock:
+        poolmanager = _adapter.poolmanager
+        if size > poolmanager.connection_pool_kw.get("maxsize", POOL_SIZE):
+            poolmanager.connection_pool_kw["maxsize"] = size
+            poolmanager.clear()
+
+def get(url, **kwargs):
+    kwargs.setdefault("timeout", TIMEOUT)
+    return session.get(url, **kwargs)
+
+def put(url, **kwargs):
+    kwargs.setdefault("timeout", TIMEOUT)
+    return session.put(url, **kwargs)
+
+def request(method, url, **kwargs):
+    kwargs.setdefault("timeout", TIMEOUT)
+    return session.request(method, url, **kwargs)
+
+def invalid_api_key(response):
+    # API Gateway answers a missing or invalid API key with 403 ForbiddenException ("Forbidden");
+    # resource policy and IAM denies are 403 AccessDeniedException ("... is not authorized ...")
+    if response.status_code != 403:
+        return False
+    error_type = response.headers.get("x-amzn-ErrorType")
+    if error_type:
+        return error_type.split(":")[0] == "ForbiddenException"
+    return "Forbidden" in response.text and "not authorized" not in response.text
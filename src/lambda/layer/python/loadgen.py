@@ -0,0 +1,112 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+
+# Load-generation mode for the caller Lambdas. Requests are started at a fixed rate (rps)
+# for `duration` seconds by up to `concurrency` workers. When every worker is busy the pacer
+# waits, and the ticks that passed meanwhile are counted as `missed` instead of being sent in a
+# burst afterwards, so an achieved_rps below the target means the path is saturated.
+#
+# Invocation event:
+#   {"load": {"rps": 20, "duration": 30, "concurrency": 8, "traffic": "mixed"}}
+# traffic is "sigv4", "nosigv4" or "mixed" (alternating); it defaults to the caller's own type.
+
+TRAFFIC_TYPES = ("sigv4", "nosigv4", "mixed")
+
+# seconds left for the Lambda to build and return the report
+RESERVED_TIME = 5
+
+_signer = None
+
+def get_signer(region):
+    global _signer
+    if _signer is None:
+        import sigv4
+        _signer = sigv4.SigV4Signer(region, 'execute-api')
+    return _signer
+
+def percentile(sorted_values, p):
+    # nearest-rank percentile
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+def summarize(latencies, status_codes, errors, elapsed):
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "achieved_rps": round(len(latencies) / elapsed, 2) if elapsed else 0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+        },
+        "status_codes": status_codes,
+        "errors": errors,
+    }
+
+def run(load, url, api_key, region, default_traffic, context=None):
+    rps = float(load.get("rps", 1))
+    duration = float(load.get("duration", 10))
+    concurrency = int(load.get("concurrency", 4))
+    traffic = load.get("traffic", default_traffic)
+    if rps <= 0 or duration <= 0 or concurrency <= 0 or traffic not in TRAFFIC_TYPES:
+        raise ValueError(f"invalid load settings: {load}")
+
+    if context is not None:
+        # never past the Lambda timeout; with less than RESERVED_TIME left nothing is sent
+        duration = max(0.0, min(duration, context.get_remaining_time_in_millis() / 1000 - RESERVED_TIME))
+    signer = get_signer(region) if traffic != "nosigv4" else None
+    # one pooled connection per worker
+    http_client.ensure_pool_size(concurrency)
+
+    lock = threading.Lock()
+    slots = threading.Semaphore(concurrency)
+    latencies = []
+    status_codes = {}
+    errors = {}
+
+    def send(i):
+        signed = traffic == "sigv4" or (traffic == "mixed" and i % 2 == 0)
+        start = time.perf_counter()
+        try:
+            response = http_client.get(url, headers={'x-api-key': api_key}, auth=signer if signed else None)
+            key, counts = str(response.status_code), status_codes
+        except Exception as e:
+            key, counts = type(e).__name__, errors
+        finally:
+            slots.release()
+        latency = round((time.perf_counter() - start) * 1000, 2)
+        with lock:
+            latencies.append(latency)
+            counts[key] = counts.get(key, 0) + 1
+
+    total = int(rps * duration)
+    missed = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for i in range(total):
+            delay = start + i / rps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -1 / rps:
+                # a whole interval late (all workers were busy): skip the tick rather than catch up
+                missed += 1
+                continue
+            slots.acquire()
+            executor.submit(send, i)
+    elapsed = time.perf_counter() - start
+
+    report = {"target_rps": rps, "duration_s": round(duration, 3), "concurrency": concurrency, "traffic": traffic,
+              "missed": missed}
+    report.update(summarize(latencies, status_codes, errors, elapsed))
+    return report
@@ -0,0 +1,178 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+import sys
+import threading
+import time
+
+# Per-phase timings written as CloudWatch Embedded Metric Format (EMF): one JSON line on stdout per
+# invocation (or scanner probe), which CloudWatch Logs turns into metrics. Phases are timed with
+#   with metrics.span("ssm"): ...
+# anywhere in the call path; spans go to the recorder of the current thread, or the one started
+# for the invocation. With no recorder (or metrics_enabled=false) a span is a no-op.
+#
+# Phases: ssm, secret (Secrets Manager), sign (SigV4), dns (execute-api lookups that missed the
+# cache), connect (TCP + TLS handshake to the VPC endpoint), api (the whole API call), dynamodb
+# (each DynamoDB call of the backend), seed (ddbinit's writes), guardduty (each GuardDuty call),
+# handler (the whole invocation) and probe (a scanner check).
+
+NAMESPACE = os.environ.get("metrics_namespace", "ZeroTrustWorkshop")
+ENABLED = os.environ.get("metrics_enabled", "true").lower() not in ("false", "0", "no")
+
+DIMENSIONS = ("function", "caller_type", "verdict")
+
+# EMF takes up to 100 values per metric in one record; longer series are split across records
+MAX_VALUES = 100
+
+class Recorder:
+
+    def __init__(self, function, caller_type="-", verdict="-", namespace=NAMESPACE):
+        self.namespace = namespace
+        self.dimensions = {"function": function, "caller_type": caller_type, "verdict": verdict}
+        self.properties = {}
+        # name -> [values]; fan-out and load runs record from several threads
+        self.values = {}
+        self.units = {}
+        self._lock = threading.Lock()
+
+    def put(self, name, value, unit="Milliseconds"):
+        with self._lock:
+            if name not in self.values:
+                self.values[name] = []
+                self.units[name] = unit
+            self.values[name].append(value)
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def set_dimensions(self, **dimensions):
+        self.dimensions.update((k, str(v)) for k, v in dimensions.items())
+
+    def set_property(self, name, value):
+        # searchable in CloudWatch Logs Insights, but not a metric dimension
+        self.properties[name] = value
+
+    def records(self):
+        # the EMF documents for what was recorded so far, without clearing it
+        with self._lock:
+            values = {name: list(v) for name, v in self.values.items()}
+        records = []
+        timestamp = int(time.time() * 1000)
+        for offset in range(0, max(map(len, values.values()), default=0), MAX_VALUES):
+            batch = {name: v[offset:offset + MAX_VALUES] for name, v in values.items() if len(v) > offset}
+            record = {
+                "_aws": {
+                    "Timestamp": timestamp,
+                    "CloudWatchMetrics": [{
+                        "Namespace": self.namespace,
+                        "Dimensions": [list(DIMENSIONS)],
+                        "Metrics": [{"Name": name, "Unit": self.units[name]} for name in batch],
+                    }],
+                },
+            }
+            record.update(self.properties)
+            record.update(self.dimensions)
+            record.update((name, v[0] if len(v) == 1 else v) for name, v in batch.items())
+            records.append(record)
+        return records
+
+    def flush(self, stream=None):
+        # writes and clears the recorded values; returns the records written
+        records = self.records()
+        with self._lock:
+            self.values = {}
+            self.units = {}
+        stream = stream or sys.stdout
+        for record in records:
+            stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+        stream.flush()
+        return records
+
+class _Span:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.put(self.name, round((time.perf_counter() - self.start) * 1000, 3))
+        return False
+
+class _NoSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+_local = threading.local()
+# recorder of the running invocation, shared by the threads it starts
+_default = None
+
+def start(function, caller_type="-", **dimensions):
+    # Starts the invocation's recorder (replacing the previous one); None when metrics are disabled.
+    # The function dimension is the deployed name when there is one, so e.g. CallerOne and
+    # CallerTwo (same code, different subnets) stay apart.
+    global _default
+    if not ENABLED:
+        _default = None
+        return None
+    _default = Recorder(os.environ.get("AWS_LAMBDA_FUNCTION_NAME", function), caller_type)
+    _default.set_dimensions(**dimensions)
+    return _default
+
+def current():
+    return getattr(_local, "recorder", None) or _default
+
+class use:
+    # with metrics.use(recorder): spans of this thread go to `recorder` (e.g. one per scanner probe)
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+
+    def __enter__(self):
+        self.previous = getattr(_local, "recorder", None)
+        _local.recorder = self.recorder
+        return self.recorder
+
+    def __exit__(self, *exc):
+        _local.recorder = self.previous
+        return False
+
+def span(name):
+    recorder = current()
+    return _Span(recorder, name) if recorder is not None else _NO_SPAN
+
+def put(name, value, unit="Milliseconds"):
+    recorder = current()
+    if recorder is not None:
+        recorder.put(name, value, unit)
+
+def status_verdict(status):
+    # same buckets as tools/access_log_analyzer.py
+    if status is None:
+        return "error"
+    if status < 400:
+        return "allowed"
+    if status in (401, 403):
+        return "blocked"
+    return "error"
+
+def finish(verdict=None, stream=None):
+    # flushes the invocation's recorder, if any, with its verdict
+    recorder = _default
+    if recorder is None:
+        return []
+    if verdict is not None:
+        recorder.set_dimensions(verdict=verdict)
+    return recorder.flush(stream)
@@ -0,0 +1,16 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Offline tests: no AWS account is needed. The layer modules, tools and the benchmark fakes
+# (fakes.py, api_server.py) are importable the way the Lambda runtime or the tools see them.
+#
+#   pip install boto3 requests python-dotenv pyyaml pytest
+#   python3 -m pytest tests
+
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+for path in ("src/lambda/layer/python", "tools", "benchmarks"):
+    sys.path.insert(0, os.path.join(ROOT, path))
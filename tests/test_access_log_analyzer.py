@@ -0,0 +1,56 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+
+import access_log_analyzer as analyzer
+
+CLF_ORDER = '10.0.1.15 - - [18/Oct/2026:10:39:29 +0000] "GET /orders/{order_id} HTTP/1.1" 200 84 0f6c1b8e-1'
+CLF_LIST = '10.0.1.15 - - [18/Oct/2026:10:39:30 +0000] "GET /orders HTTP/1.1" 403 60 0f6c1b8e-2'
+JSON_RECORD = {
+    "requestTimeEpoch": 1792319971000,
+    "ip": "10.0.2.20",
+    "vpceId": "vpce-0123456789abcdef0",
+    "caller": "-",
+    "user": "-",
+    "httpMethod": "GET",
+    "resourcePath": "/orders/{order_id}",
+    "status": "200",
+    "responseLatency": "42",
+}
+
+def test_clf_line_with_braces_in_the_path():
+    epoch, status, latency, values = analyzer.parse_line(CLF_ORDER)
+    assert epoch == 1792319969
+    assert (status, latency) == (200, None)
+    assert values == {"ip": "10.0.1.15", "vpce": "-", "caller": "-", "resource": "GET /orders/{order_id}"}
+
+def test_json_line_with_and_without_leading_timestamps():
+    line = json.dumps(JSON_RECORD)
+    expected = (1792319971.0, 200, 42.0, {
+        "ip": "10.0.2.20", "vpce": "vpce-0123456789abcdef0", "caller": "-", "resource": "GET /orders/{order_id}",
+    })
+    assert analyzer.parse_line(line) == expected
+    # CloudWatch export, `logs tail --format short` and `--format detailed`
+    assert analyzer.parse_line("2026-10-18T10:39:31.000Z " + line) == expected
+    assert analyzer.parse_line("2026-10-18T10:39:31 " + line) == expected
+    assert analyzer.parse_line("2026-10-18T10:39:31.000000+00:00 0f6c1b8e-stream " + line) == expected
+
+def test_mixed_clf_and_json_lines():
+    lines = [
+        CLF_ORDER,
+        "2026-10-18T10:39:30.000Z " + CLF_LIST,
+        json.dumps(JSON_RECORD),
+        "2026-10-18T10:39:31.000Z " + json.dumps(dict(JSON_RECORD, status="403", responseLatency="7")),
+        "not an access log line {",
+    ]
+    totals = {}
+    rows = list(analyzer.analyze(lines, window=60, dims=("ip",), totals=totals))
+
+    assert totals["lines"] == 5
+    assert totals["skipped"] == 1
+    by_ip = {row["ip"]: row for row in rows}
+    assert (by_ip["10.0.1.15"]["requests"], by_ip["10.0.1.15"]["allowed"], by_ip["10.0.1.15"]["blocked"]) == (2, 1, 1)
+    assert by_ip["10.0.1.15"]["latency_ms"] is None
+    assert (by_ip["10.0.2.20"]["requests"], by_ip["10.0.2.20"]["allowed"], by_ip["10.0.2.20"]["blocked"]) == (2, 1, 1)
+    assert by_ip["10.0.2.20"]["latency_ms"]["max"] == 42.0
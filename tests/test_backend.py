@@ -0,0 +1,184 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import importlib.util
+import json
+import os
+
+import pytest
+
+from conftest import ROOT
+
+TABLE_NAME = "test-orders"
+ORDERS = 250
+
+@pytest.fixture
+def fakes():
+    pytest.importorskip("boto3")
+    import fakes
+    fakes.install()
+    fakes.seed_orders(TABLE_NAME, ORDERS)
+    fakes.calls.clear()
+    return fakes
+
+def load_backend(monkeypatch, **env):
+    # a fresh copy of the backend Lambda, so module-level settings and caches start over
+    monkeypatch.syspath_prepend(os.path.join(ROOT, "src/lambda/backend"))
+    monkeypatch.setenv("TABLE_NAME", TABLE_NAME)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    spec = importlib.util.spec_from_file_location("backend_lambda_function", os.path.join(ROOT, "src/lambda/backend/lambda_function.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def backend(monkeypatch, fakes):
+    return load_backend(monkeypatch, CACHE_TTL="30", PAGE_SIZE="100")
+
+@pytest.fixture
+def whole_table(monkeypatch, fakes):
+    return load_backend(monkeypatch, CACHE_TTL="30", PAGE_SIZE="0")
+
+def get_orders(backend, params=None, headers=None):
+    return backend.handle({"resource": "/orders", "httpMethod": "GET",
+                           "queryStringParameters": params, "headers": headers or {}})
+
+def orders(response):
+    status, *items = json.loads(response["body"])
+    assert status == "SUCCESS"
+    return items
+
+def test_warm_revalidation_is_a_304_without_a_scan(backend, fakes):
+    first = get_orders(backend)
+    assert first["statusCode"] == 200
+    scans = fakes.calls["dynamodb.Scan"]
+    assert scans > 0
+
+    fakes.calls.clear()
+    revalidated = get_orders(backend, headers={"If-None-Match": first["headers"]["ETag"]})
+    assert revalidated["statusCode"] == 304
+    assert revalidated["headers"]["ETag"] == first["headers"]["ETag"]
+    assert revalidated["headers"]["X-Next-Token"] == first["headers"]["X-Next-Token"]
+    assert fakes.calls["dynamodb.Scan"] == 0
+
+    repeated = get_orders(backend)
+    assert repeated["body"] == first["body"]
+    assert fakes.calls["dynamodb.Scan"] == 0
+
+def test_a_changed_etag_gets_the_body(backend):
+    response = get_orders(backend, headers={"if-none-match": '"stale", W/"older"'})
+    assert response["statusCode"] == 200
+    assert len(orders(response)) == 100
+
+def test_an_expired_response_scans_again(backend, fakes):
+    first = get_orders(backend)
+    for entry in backend.orders_cache.values():
+        entry["expires"] = 0
+    fakes.calls.clear()
+
+    again = get_orders(backend, headers={"If-None-Match": first["headers"]["ETag"]})
+    # same data, so the client's copy is still good, but it was checked against the table
+    assert again["statusCode"] == 304
+    assert fakes.calls["dynamodb.Scan"] == 1
+
+def test_without_a_ttl_nothing_is_cached(monkeypatch, fakes):
+    backend = load_backend(monkeypatch, CACHE_TTL="0", PAGE_SIZE="100")
+    get_orders(backend)
+    get_orders(backend)
+    assert fakes.calls["dynamodb.Scan"] == 2
+    assert backend.orders_cache == {}
+
+def test_pages_follow_next_token_to_the_end(backend):
+    ids, params, pages = [], {"limit": "100"}, 0
+    while True:
+        response = get_orders(backend, params)
+        assert response["statusCode"] == 200
+        ids.extend(order["order_id"] for order in orders(response))
+        pages += 1
+        token = response["headers"].get("X-Next-Token")
+        if not token:
+            break
+        params = {"limit": "100", "next_token": token}
+
+    assert pages == 3
+    assert ids == [f"{i:012X}" for i in range(ORDERS)]
+
+@pytest.mark.parametrize("params", [{"limit": "0"}, {"limit": "1001"}, {"limit": "ten"}, {"next_token": "not-a-token"}])
+def test_invalid_page_parameters(backend, fakes, params):
+    assert get_orders(backend, params)["statusCode"] == 400
+    assert fakes.calls["dynamodb.Scan"] == 0
+
+def test_cache_entries_are_per_page_and_fields(backend, fakes):
+    first = get_orders(backend, {"limit": "10"})
+    token = first["headers"]["X-Next-Token"]
+    second = get_orders(backend, {"limit": "10", "next_token": token})
+    projected = get_orders(backend, {"limit": "10", "fields": "pickup"})
+    assert len({first["body"], second["body"], projected["body"]}) == 3
+    assert orders(projected)[0] == {"pickup": "SFO"}
+
+    fakes.calls.clear()
+    assert get_orders(backend, {"limit": "10", "next_token": token})["body"] == second["body"]
+    assert fakes.calls["dynamodb.Scan"] == 0
+
+def test_whole_table_is_cached_with_its_etag(whole_table, fakes):
+    first = get_orders(whole_table)
+    assert len(orders(first)) == ORDERS
+    assert "X-Next-Token" not in first["headers"]
+
+    fakes.calls.clear()
+    assert get_orders(whole_table, headers={"If-None-Match": first["headers"]["ETag"]})["statusCode"] == 304
+    assert fakes.calls["dynamodb.Scan"] == 0
+
+def test_order_lookup_is_one_get_item(backend, fakes):
+    event = {"resource": "/orders/{order_id}", "httpMethod": "GET", "pathParameters": {"order_id": "00000000002A"}}
+    response = backend.handle(event)
+    assert orders(response) == [{"order_id": "00000000002A", "pickup": "SFO", "dropoff": "SJC"}]
+    assert (fakes.calls["dynamodb.GetItem"], fakes.calls["dynamodb.Scan"]) == (1, 0)
+
+    missing = dict(event, pathParameters={"order_id": "FFFFFFFFFFFF"})
+    assert backend.handle(missing)["statusCode"] == 404
+
+def batch_get(backend, body):
+    return backend.handle({"resource": "/orders/batch", "httpMethod": "POST", "body": body})
+
+def leave_unprocessed(monkeypatch, fakes, rounds):
+    # the first `rounds` calls process only the first half of the keys
+    batch_get_item = fakes.FakeClient.batch_get_item
+    state = {"calls": 0}
+
+    def partial(self, RequestItems, **kwargs):
+        state["calls"] += 1
+        if state["calls"] > rounds:
+            return batch_get_item(self, RequestItems, **kwargs)
+        [(table_name, request)] = RequestItems.items()
+        half = len(request["Keys"]) // 2
+        response = batch_get_item(self, {table_name: dict(request, Keys=request["Keys"][:half])}, **kwargs)
+        response["UnprocessedKeys"] = {table_name: dict(request, Keys=request["Keys"][half:])}
+        return response
+
+    monkeypatch.setattr(fakes.FakeClient, "batch_get_item", partial)
+
+def test_batch_get_retries_unprocessed_keys(backend, fakes, monkeypatch):
+    monkeypatch.setattr(backend.time, "sleep", lambda seconds: None)
+    leave_unprocessed(monkeypatch, fakes, rounds=2)
+    order_ids = [f"{i:012X}" for i in range(150)]
+
+    response = batch_get(backend, json.dumps({"order_ids": order_ids + order_ids[:5]}))
+
+    assert response["statusCode"] == 200
+    assert sorted(order["order_id"] for order in orders(response)) == order_ids
+    # chunks of 100 and 50; the first one takes two retries
+    assert fakes.calls["dynamodb.BatchGetItem"] == 4
+
+def test_batch_get_gives_up_on_keys_that_stay_unprocessed(backend, fakes, monkeypatch):
+    monkeypatch.setattr(backend.time, "sleep", lambda seconds: None)
+    leave_unprocessed(monkeypatch, fakes, rounds=1000)
+    response = batch_get(backend, json.dumps({"order_ids": ["000000000001", "000000000002"]}))
+    assert response["statusCode"] == 503
+    assert fakes.calls["dynamodb.BatchGetItem"] == backend.BATCH_GET_RETRIES + 1
+
+@pytest.mark.parametrize("body", [None, "not json", '{"ids": []}', '{"order_ids": [1, 2]}'])
+def test_batch_get_rejects_other_bodies(backend, fakes, body):
+    assert batch_get(backend, body)["statusCode"] == 400
+    assert fakes.calls["dynamodb.BatchGetItem"] == 0
@@ -0,0 +1,57 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+
+import pytest
+
+from conftest import ROOT
+
+@pytest.fixture
+def classifier(monkeypatch):
+    monkeypatch.syspath_prepend(os.path.join(ROOT, "src/ec2/curl-pkg"))
+    import classifier
+    return classifier
+
+@pytest.fixture
+def scanner_rules(classifier):
+    # the rules the scanner ships with
+    return classifier.load(os.path.join(ROOT, "src/ec2/curl-pkg/config.yml"))
+
+@pytest.mark.parametrize("result, expected", [
+    (dict(status=200, body='["SUCCESS", {"order_id": "6472445C25D7"}]'), ("Allowed", "-")),
+    (dict(status=403, body='{"message":"User: anonymous is not authorized","workshopmsg":"hit-apigw"}'), ("Blocked", "API Gateway")),
+    (dict(status=403, body='{"Message":"User: anonymous is not authorized to perform: execute-api:Invoke"}'), ("Blocked", "VPC endpoint")),
+    (dict(status=403, body='{"message":"Missing Authentication Token"}'), ("Blocked", "API Gateway")),
+    (dict(exception="ConnectTimeout"), ("Blocked", "Security Group")),
+    # an SSM command's output
+    (dict(body="ConnectTimeout: HTTPSConnectionPool(host='abc.execute-api...')"), ("Blocked", "Security Group")),
+])
+def test_scanner_rules(classifier, scanner_rules, result, expected):
+    assert scanner_rules.classify(classifier.ProbeResult(**result)) == expected
+
+def test_first_matching_rule_wins(classifier, scanner_rules):
+    # a body several rules match gets the verdict of the first one
+    result = classifier.ProbeResult(status=200, body='["SUCCESS", {"note": "not authorized"}]')
+    assert scanner_rules.classify(result) == ("Allowed", "-")
+
+def test_no_match_shows_the_start_of_the_body(classifier, scanner_rules):
+    assert scanner_rules.classify(classifier.ProbeResult(status=502, body="x" * 500)) == ("x" * 100, "unknown")
+    assert scanner_rules.classify(classifier.ProbeResult(exception="SSLError")) == ("SSLError", "unknown")
+    assert scanner_rules.classify(classifier.ProbeResult()) == ("", "unknown")
+
+def test_only_the_body_prefix_is_searched(classifier):
+    rules = classifier.Classifier([{"verdict": "Allowed", "body": "SUCCESS"}], body_prefix=16)
+    assert rules.classify(classifier.ProbeResult(body="SUCCESS" + "x" * 100))[0] == "Allowed"
+    assert rules.classify(classifier.ProbeResult(body="x" * 100 + "SUCCESS"))[1] == "unknown"
+
+def test_status_and_header_conditions(classifier):
+    # a new enforcement point is a config entry, e.g. a WAF in front of the API
+    rules = classifier.Classifier([
+        {"verdict": "Blocked", "enforced_at": "WAF", "status": [403, 405], "headers": {"X-Amzn-ErrorType": "^WAF"}},
+        {"verdict": "Blocked", "enforced_at": "API Gateway", "status": 403},
+    ])
+    waf = classifier.ProbeResult(status=403, headers={"x-amzn-errortype": "WAFBlock"}, body="")
+    assert rules.classify(waf) == ("Blocked", "WAF")
+    assert rules.classify(waf._replace(headers={})) == ("Blocked", "API Gateway")
+    assert rules.classify(waf._replace(status=200))[1] == "unknown"
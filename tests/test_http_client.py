@@ -0,0 +1,37 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import http_client
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(0.5)
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def slow_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/orders"
+    server.shutdown()
+    server.server_close()
+
+@pytest.mark.parametrize("retries", [0, 1])
+def test_read_timeout_is_reported_as_a_read_timeout(monkeypatch, slow_url, retries):
+    monkeypatch.setattr(http_client, "GET_RETRIES", retries)
+    session = requests.Session()
+    session.mount("http://", http_client._TimedAdapter(max_retries=http_client._get_retry()))
+    with pytest.raises(requests.ReadTimeout):
+        session.get(slow_url, timeout=(1, 0.1))
@@ -0,0 +1,17 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import pytest
+
+import loadgen
+
+@pytest.mark.parametrize("p, expected", [(0, 1), (10, 1), (25, 3), (50, 5), (90, 9), (95, 10), (99, 10), (100, 10)])
+def test_nearest_rank_of_ten(p, expected):
+    assert loadgen.percentile(list(range(1, 11)), p) == expected
+
+@pytest.mark.parametrize("p, expected", [(1, 1), (50, 50), (90, 90), (95, 95), (99, 99), (99.9, 100), (100, 100)])
+def test_nearest_rank_of_a_hundred(p, expected):
+    assert loadgen.percentile(list(range(1, 101)), p) == expected
+
+def test_no_values():
+    assert loadgen.percentile([], 50) is None
@@ -0,0 +1,91 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import importlib.util
+import json
+import os
+
+import pytest
+
+import metrics
+from conftest import ROOT
+
+import targets
+
+def emf_records(output):
+    return [json.loads(line) for line in output.splitlines() if line.startswith("{")]
+
+def test_records_have_the_emf_envelope():
+    recorder = metrics.Recorder("caller_nosigv4", "nosigv4")
+    recorder.put("ssm", 12.5)
+    recorder.put("api", 3.0)
+    recorder.put("api", 4.0)
+    recorder.set_property("request_id", "abc")
+
+    [record] = recorder.records()
+    [directive] = record["_aws"]["CloudWatchMetrics"]
+    assert isinstance(record["_aws"]["Timestamp"], int)
+    assert directive["Namespace"] == metrics.NAMESPACE
+    assert directive["Dimensions"] == [["function", "caller_type", "verdict"]]
+    assert directive["Metrics"] == [{"Name": "ssm", "Unit": "Milliseconds"}, {"Name": "api", "Unit": "Milliseconds"}]
+    assert (record["function"], record["caller_type"], record["verdict"]) == ("caller_nosigv4", "nosigv4", "-")
+    assert record["ssm"] == 12.5
+    assert record["api"] == [3.0, 4.0]
+    assert record["request_id"] == "abc"
+
+def test_long_series_are_split_across_records():
+    recorder = metrics.Recorder("loadgen")
+    for i in range(metrics.MAX_VALUES + 5):
+        recorder.put("api", float(i))
+    recorder.put("handler", 1.0)
+
+    first, second = recorder.records()
+    assert len(first["api"]) == metrics.MAX_VALUES
+    assert first["handler"] == 1.0
+    assert second["api"] == [float(i) for i in range(metrics.MAX_VALUES, metrics.MAX_VALUES + 5)]
+    assert [m["Name"] for m in second["_aws"]["CloudWatchMetrics"][0]["Metrics"]] == ["api"]
+
+def test_finish_without_a_recorder_writes_nothing(capsys, monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    assert metrics.start("caller_nosigv4") is None
+    with metrics.span("api"):
+        pass
+    assert metrics.finish("allowed") == []
+    assert capsys.readouterr().out == ""
+
+@pytest.fixture
+def caller(monkeypatch):
+    # the nosigv4 caller Lambda against the AWS fakes and the local API Gateway stand-in
+    pytest.importorskip("boto3")
+    import api_server
+    import fakes
+
+    for name, value in targets.target_env("caller_nosigv4").items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+    fakes.install()
+    server = api_server.start()
+
+    path = os.path.join(ROOT, "src/lambda/caller_nosigv4/lambda_function.py")
+    spec = importlib.util.spec_from_file_location("caller_nosigv4_lambda_function", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    import http_client
+    api_server.route_session(http_client.session, server)
+    yield module
+    server.shutdown()
+
+def test_caller_invocation_logs_one_record_per_invocation(caller, capsys):
+    caller.lambda_handler({"source": "aws.events"}, None)
+    caller.lambda_handler({"source": "aws.events"}, None)
+
+    cold, warm = emf_records(capsys.readouterr().out)
+    for record in (cold, warm):
+        assert record["_aws"]["CloudWatchMetrics"][0]["Namespace"] == metrics.NAMESPACE
+        assert (record["function"], record["caller_type"], record["verdict"]) == ("caller_nosigv4", "nosigv4", "allowed")
+        assert record["handler"] >= record["api"] > 0
+
+    # the cold invocation reads the API config, the warm one uses the cache
+    assert {"ssm", "secret", "api", "handler"} <= {m["Name"] for m in cold["_aws"]["CloudWatchMetrics"][0]["Metrics"]}
+    assert cold["handler"] >= cold["ssm"] + cold["secret"] + cold["api"]
+    assert "ssm" not in warm and "secret" not in warm
@@ -0,0 +1,59 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import csv
+import os
+
+import pytest
+
+from conftest import ROOT
+
+OLD_HEADER = "timestamp,caller,check,expectation,verdict,enforced_at,latency_ms,as_expected"
+OLD_ROW = "2026-10-18T10:39:29,CallerOne,api,denied,denied,resource_policy,12.5,True"
+
+@pytest.fixture
+def result_log(monkeypatch):
+    monkeypatch.syspath_prepend(os.path.join(ROOT, "src/ec2/curl-pkg"))
+    import result_log
+    return result_log
+
+def rows(path):
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+def test_appending_to_an_older_schema_file_starts_a_new_one(result_log, tmp_path):
+    path = tmp_path / "results.csv"
+    path.write_text(f"{OLD_HEADER}\n{OLD_ROW}\n")
+
+    log = result_log.ResultLog(str(path), "csv")
+    log.write({"caller": "CallerFour", "verdict": "allowed", "target": "service-b"})
+    log.close()
+
+    header, row = rows(path)
+    assert header == result_log.FIELDS
+    assert dict(zip(header, row))["target"] == "service-b"
+    assert (tmp_path / "results.csv.1").read_text() == f"{OLD_HEADER}\n{OLD_ROW}\n"
+
+def test_appending_to_a_current_file_keeps_it(result_log, tmp_path):
+    path = str(tmp_path / "results.csv")
+    for caller in ("CallerFour", "CallerFive"):
+        log = result_log.ResultLog(path, "csv")
+        log.write({"caller": caller})
+        log.close()
+
+    header, first, second = rows(path)
+    assert header == result_log.FIELDS
+    assert (first[1], second[1]) == ("CallerFour", "CallerFive")
+    assert not os.path.exists(path + ".1")
+
+def test_without_backups_the_older_file_is_replaced(result_log, tmp_path):
+    path = tmp_path / "results.csv"
+    path.write_text(f"{OLD_HEADER}\n{OLD_ROW}\n")
+
+    log = result_log.ResultLog(str(path), "csv", backup_count=0)
+    log.write({"caller": "CallerFour"})
+    log.close()
+
+    header, row = rows(path)
+    assert header == result_log.FIELDS
+    assert row[1] == "CallerFour"
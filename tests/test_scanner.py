@@ -0,0 +1,55 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import importlib
+import os
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+import targets
+
+@pytest.fixture
+def scanner(monkeypatch):
+    # the EC2 scanner against the AWS fakes, imported the way /tmp/workshop has it
+    pytest.importorskip("boto3")
+    import fakes
+
+    for name, value in targets.target_env("scanner").items():
+        monkeypatch.setenv(name, value)
+    fakes.install()
+    monkeypatch.syspath_prepend(os.path.join(ROOT, "src/ec2/curl-pkg"))
+    for name in ("runtime", "scanner"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    monkeypatch.setattr(fakes, "unmanaged_instances", {"i-unmanaged"})
+    fakes.calls.clear()
+    yield importlib.import_module("scanner")
+    for name in ("runtime", "scanner"):
+        sys.modules.pop(name, None)
+
+def test_one_command_for_the_managed_instances(scanner):
+    import fakes
+
+    results = scanner.get_ssm_cmds(["i-one", "i-unmanaged", "i-two"])
+
+    assert results["i-unmanaged"][0] == "InvalidInstanceId: not managed by SSM"
+    assert results["i-one"][0] == results["i-two"][0] == "ConnectTimeout"
+    assert fakes.calls["ssm.SendCommand"] == 1
+    assert fakes.calls["ssm.DescribeInstanceInformation"] == 1
+
+def test_a_batch_rejected_after_the_check_is_bisected(scanner, monkeypatch):
+    import fakes
+
+    # the agent drops off between DescribeInstanceInformation and SendCommand
+    online = lambda self, Filters=(), **kwargs: {"InstanceInformationList": [
+        {"InstanceId": i, "PingStatus": "Online"} for f in Filters for i in f["Values"]]}
+    monkeypatch.setattr(fakes.FakeClient, "describe_instance_information", online)
+
+    results = scanner.get_ssm_cmds(["i-one", "i-two", "i-unmanaged", "i-three"])
+
+    assert results["i-unmanaged"][0].startswith("InvalidInstanceId: ")
+    assert {results[i][0] for i in ("i-one", "i-two", "i-three")} == {"ConnectTimeout"}
+    # [1, 2, x, 3] -> [1, 2] + [x, 3] -> [x] + [3]
+    assert fakes.calls["ssm.SendCommand"] == 5
@@ -0,0 +1,57 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+
+import pytest
+
+from conftest import ROOT
+
+pytest.importorskip("botocore")
+
+@pytest.fixture
+def seeder(monkeypatch):
+    monkeypatch.syspath_prepend(os.path.join(ROOT, "src/lambda/ddbinit"))
+    import seeder
+    monkeypatch.setattr(seeder.time, "sleep", lambda seconds: None)
+    return seeder
+
+class ThrottledClient:
+    # writes `capacity` put requests per call and hands the rest back as unprocessed
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = []
+
+    def batch_write_item(self, RequestItems):
+        [(table_name, requests)] = RequestItems.items()
+        written, unprocessed = requests[:self.capacity], requests[self.capacity:]
+        self.items.extend(r["PutRequest"]["Item"] for r in written)
+        return {"UnprocessedItems": {table_name: unprocessed} if unprocessed else {}}
+
+def test_a_slow_table_is_retried_while_items_get_written(seeder):
+    client = ThrottledClient(capacity=1)
+    batch = list(seeder.generate_orders(seeder.BATCH_SIZE))
+
+    # more retries than a fixed limit would have allowed, and no time without progress
+    assert seeder.write_batch(client, "orders", batch, retry_timeout=0) == seeder.BATCH_SIZE - 1
+    assert client.items == batch
+
+def test_a_batch_without_progress_gives_up(seeder):
+    with pytest.raises(RuntimeError, match="none written"):
+        seeder.write_batch(ThrottledClient(capacity=0), "orders", list(seeder.generate_orders(3)), retry_timeout=0)
+
+def test_throttling_errors_are_retried(seeder):
+    from botocore.exceptions import ClientError
+
+    class Client(ThrottledClient):
+        calls = 0
+
+        def batch_write_item(self, RequestItems):
+            self.calls += 1
+            if self.calls == 1:
+                raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": ""}}, "BatchWriteItem")
+            return super().batch_write_item(RequestItems)
+
+    client = Client(capacity=25)
+    assert seeder.write_batch(client, "orders", list(seeder.generate_orders(3))) == 1
+    assert len(client.items) == 3
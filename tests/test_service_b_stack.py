@@ -0,0 +1,81 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Synthesizes ServiceBStack with config.yml and checks that the dashboard and the alarms follow
+# dashboard_widgets and dashboard_alarms. Needs the CDK libraries (pip install -r requirements.txt
+# aws-cdk.assertions); skipped without them.
+
+import json
+
+import pytest
+import yaml
+
+from conftest import ROOT
+
+assertions = pytest.importorskip("aws_cdk.assertions")
+
+@pytest.fixture(scope="module")
+def configs():
+    with open(f"{ROOT}/config.yml") as f:
+        return yaml.safe_load(f)
+
+@pytest.fixture(scope="module")
+def template():
+    from aws_cdk import core as cdk
+    from zerotrust_service2service_workshop.service_b_stack import ServiceBStack
+
+    # the stack reads ./config.yml and, in dev mode, ./src/lambda
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(ROOT)
+        app = cdk.App()
+        return assertions.Template.from_stack(ServiceBStack(app, "ServiceBStack"))
+
+def dashboard_body(template):
+    # DashboardBody is a Fn::Join of JSON text and tokens (API name, function name, region, alarm
+    # ARNs); the tokens all sit inside JSON strings, so a placeholder keeps the text parseable
+    [dashboard] = template.find_resources("AWS::CloudWatch::Dashboard").values()
+    body = dashboard["Properties"]["DashboardBody"]
+    if isinstance(body, dict):
+        separator, parts = body["Fn::Join"]
+        body = separator.join(part if isinstance(part, str) else "TOKEN" for part in parts)
+    return json.loads(body)
+
+def expanded(metric):
+    statistics = metric["statistic"] if isinstance(metric["statistic"], list) else [metric["statistic"]]
+    label = metric.get("label", metric["metric"])
+    return [(metric["metric"], statistic, f"{label} {statistic}" if len(statistics) > 1 else label) for statistic in statistics]
+
+def test_one_graph_per_widget_plus_the_alarm_status(template, configs):
+    widgets = dashboard_body(template)["widgets"]
+    graphs = [w for w in widgets if w["type"] == "metric"]
+    [alarm_status] = [w for w in widgets if w["type"] == "alarm"]
+
+    assert [g["properties"]["title"] for g in graphs] == [w["title"] for w in configs["dashboard_widgets"]]
+    for graph, widget in zip(graphs, configs["dashboard_widgets"]):
+        assert graph["width"] == widget.get("width", 12)
+        assert graph["x"] + graph["width"] <= 24
+        lines = graph["properties"]["metrics"]
+        expected = [line for metric in widget["metrics"] for line in expanded(metric)]
+        assert len(lines) == len(expected)
+        for line, (metric_name, statistic, label) in zip(lines, expected):
+            options = line[-1]
+            assert metric_name in line
+            assert (options["stat"], options["label"]) == (statistic, label)
+    assert len(alarm_status["properties"]["alarms"]) == len(configs["dashboard_alarms"])
+
+def test_one_alarm_per_config_entry(template, configs):
+    namespaces = {"api": "AWS/ApiGateway", "backend": "AWS/Lambda", "orders_table": "AWS/DynamoDB"}
+    template.resource_count_is("AWS::CloudWatch::Alarm", len(configs["dashboard_alarms"]))
+    for alarm in configs["dashboard_alarms"]:
+        statistic = alarm["statistic"]
+        template.has_resource_properties("AWS::CloudWatch::Alarm", {
+            "Namespace": namespaces[alarm["source"]],
+            "MetricName": alarm["metric"],
+            ("ExtendedStatistic" if statistic.startswith("p") else "Statistic"): statistic,
+            "Threshold": alarm["threshold"],
+            "EvaluationPeriods": alarm["periods"],
+            "DatapointsToAlarm": alarm["datapoints"],
+            "ComparisonOperator": "GreaterThanOrEqualToThreshold",
+            "TreatMissingData": "notBreaching",
+            "Period": configs["dashboard_period_minutes"] * 60,
+        })
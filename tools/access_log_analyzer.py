@@ -0,0 +1,292 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Streaming analyzer for ServiceB's API Gateway access logs (the APIAccessLogs log group).
+# Reads CLF or JSON lines (api_access_log_format in config.yml) from exported files, plain or
+# gzipped, or from stdin, and prints a rollup per time window and caller: request count, allowed
+# vs. blocked, and latency percentiles. Memory stays bounded whatever the input size: only a few
+# windows are open at a time, each tracks up to --max-keys callers, and latencies go into a
+# fixed-size quantile sketch.
+#
+#   python3 tools/access_log_analyzer.py exportedlogs/*/*.gz --window 300 --by ip,caller
+#   aws logs tail <APIAccessLogs> --since 1h --format short | python3 tools/access_log_analyzer.py -
+#
+# CLF lines carry no latency; deploy with api_access_log_format: json to get percentiles and the
+# VPC endpoint ID. Lines with a leading timestamp (CloudWatch exports, `logs tail`) are handled.
+
+import argparse
+import calendar
+import datetime
+import gzip
+import json
+import math
+import re
+import sys
+
+DIMENSIONS = ("ip", "vpce", "caller", "resource")
+
+# $context.identity.sourceIp $context.identity.caller $context.identity.user [$context.requestTime]
+# "$context.httpMethod $context.resourcePath $context.protocol" $context.status $context.responseLength $context.requestId
+CLF = re.compile(r'(\S+) (\S+) (\S+) \[([^\]]+)\] "(\S+) (\S+) (\S+)" (\d{3}) (\S+) (\S+)')
+
+# a JSON record starts the line, or follows up to two leading tokens (a timestamp from CloudWatch
+# exports or `logs tail`, plus the log stream with `--format detailed`). Anywhere else a brace is
+# part of a CLF line, e.g. the resource path /orders/{order_id}.
+JSON_START = re.compile(r"\s*(?:\S+\s+){0,2}?\{")
+
+MONTHS = {m: i for i, m in enumerate(("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+
+class QuantileSketch:
+    # DDSketch-style: values fall into logarithmically spaced buckets, so every quantile is within
+    # `relative_accuracy` of the exact value. Past max_buckets the lowest buckets are merged, which
+    # only costs accuracy at the low end; the high percentiles stay exact to the accuracy.
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        if self.max is None or value > self.max:
+            self.max = value
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        low, next_low = sorted(self.buckets)[:2]
+        self.buckets[next_low] += self.buckets.pop(low)
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # middle of the bucket, in the relative sense
+                return min(2 * self.gamma ** index / (self.gamma + 1), self.max)
+        return self.max
+
+class Stats:
+    __slots__ = ("requests", "allowed", "blocked", "errors", "latency")
+
+    def __init__(self):
+        self.requests = 0
+        self.allowed = 0
+        self.blocked = 0
+        self.errors = 0
+        self.latency = QuantileSketch()
+
+    def add(self, status, latency):
+        self.requests += 1
+        if status < 400:
+            self.allowed += 1
+        elif status in (401, 403):
+            # resource policy denies, missing/invalid API keys and SigV4 failures
+            self.blocked += 1
+        else:
+            self.errors += 1
+        if latency is not None:
+            self.latency.add(latency)
+
+_day_cache = {}
+# consecutive lines mostly share the same second
+_last_time = [None, None]
+
+def parse_request_time(value):
+    # "18/Oct/2026:10:39:29 +0000" -> epoch seconds; the date part is parsed once per day
+    if value == _last_time[0]:
+        return _last_time[1]
+    day = value[:11]
+    start = _day_cache.get(day)
+    if start is None:
+        start = calendar.timegm((int(value[7:11]), MONTHS[value[3:6]], int(value[:2]), 0, 0, 0))
+        _day_cache[day] = start
+    seconds = start + int(value[12:14]) * 3600 + int(value[15:17]) * 60 + int(value[18:20])
+    offset = value[21:26]
+    if offset and offset != "+0000":
+        sign = -1 if offset[0] == "+" else 1
+        seconds += sign * (int(offset[1:3]) * 3600 + int(offset[3:5]) * 60)
+    _last_time[:] = value, seconds
+    return seconds
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_line(line):
+    # Returns (epoch, status, latency_ms or None, {dimension: value}), or None if it isn't an access log line
+    json_start = JSON_START.match(line)
+    if json_start is not None:
+        try:
+            record = json.loads(line[json_start.end() - 1:])
+        except ValueError:
+            return None
+        epoch = _number(record.get("requestTimeEpoch"))
+        if epoch is not None:
+            epoch /= 1000
+        elif record.get("requestTime"):
+            epoch = parse_request_time(record["requestTime"])
+        status = _number(record.get("status"))
+        if epoch is None or status is None:
+            return None
+        caller = next((record[k] for k in ("userArn", "caller", "user", "apiKeyId") if record.get(k) not in (None, "", "-")), "-")
+        return epoch, int(status), _number(record.get("responseLatency")), {
+            "ip": record.get("ip") or "-",
+            "vpce": record.get("vpceId") or "-",
+            "caller": caller,
+            "resource": f'{record.get("httpMethod", "-")} {record.get("resourcePath", "-")}',
+        }
+
+    match = CLF.search(line)
+    if match is None:
+        return None
+    ip, caller, user, request_time, method, resource, _, status = match.groups()[:8]
+    try:
+        epoch = parse_request_time(request_time)
+    except (KeyError, ValueError):
+        return None
+    return epoch, int(status), None, {
+        "ip": ip,
+        "vpce": "-",
+        "caller": caller if caller != "-" else user,
+        "resource": f"{method} {resource}",
+    }
+
+def rollup(start, window, key, stats, dims):
+    iso = lambda t: datetime.datetime.fromtimestamp(t, datetime.timezone.utc).isoformat()
+    latency = stats.latency
+    return {
+        "window_start": iso(start),
+        "window_end": iso(start + window),
+        **dict(zip(dims, key)),
+        "requests": stats.requests,
+        "allowed": stats.allowed,
+        "blocked": stats.blocked,
+        "errors": stats.errors,
+        "latency_ms": {
+            "p50": _round(latency.quantile(0.5)),
+            "p90": _round(latency.quantile(0.9)),
+            "p99": _round(latency.quantile(0.99)),
+            "max": latency.max,
+        } if latency.count else None,
+    }
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+def analyze(lines, window=60, dims=("ip",), max_keys=10000, open_windows=2, top=None, totals=None):
+    # Yields rollups window by window as the input moves past them. Lines for a window that was
+    # already emitted (more than `open_windows` behind the newest) are counted in totals["late"].
+    if totals is None:
+        totals = {}
+    totals.update(lines=0, skipped=0, late=0, overflow=0)
+    windows = {}
+    emitted_before = None
+
+    def emit(start):
+        keys = windows.pop(start)
+        ranked = sorted(keys.items(), key=lambda kv: kv[1].requests, reverse=True)
+        for key, stats in ranked[:top] if top else ranked:
+            yield rollup(start, window, key, stats, dims)
+
+    for line in lines:
+        totals["lines"] += 1
+        parsed = parse_line(line)
+        if parsed is None:
+            totals["skipped"] += 1
+            continue
+        epoch, status, latency, values = parsed
+        start = int(epoch // window * window)
+        if emitted_before is not None and start < emitted_before:
+            totals["late"] += 1
+            continue
+
+        keys = windows.get(start)
+        if keys is None:
+            keys = windows[start] = {}
+            while len(windows) > open_windows:
+                oldest = min(windows)
+                emitted_before = oldest + window
+                yield from emit(oldest)
+            if start not in windows:
+                totals["late"] += 1
+                continue
+
+        key = tuple(map(values.__getitem__, dims))
+        stats = keys.get(key)
+        if stats is None:
+            if len(keys) >= max_keys:
+                # everything past max_keys callers in a window is folded into one row
+                totals["overflow"] += 1
+                key = ("(other)",) * len(dims)
+                stats = keys.get(key)
+            if stats is None:
+                stats = keys[key] = Stats()
+        stats.add(status, latency)
+
+    for start in sorted(windows):
+        yield from emit(start)
+
+def read_lines(paths):
+    for path in paths:
+        if path == "-":
+            yield from sys.stdin
+        elif path.endswith(".gz"):
+            with gzip.open(path, "rt", errors="replace") as f:
+                yield from f
+        else:
+            with open(path, errors="replace", buffering=1024 * 1024) as f:
+                yield from f
+
+def print_table(rows, dims):
+    columns = ["window_start", *dims, "requests", "allowed", "blocked", "errors", "p50", "p90", "p99"]
+    print("  ".join(c.ljust(24 if c in ("window_start", "caller") else 12) for c in columns))
+    for row in rows:
+        latency = row["latency_ms"] or {}
+        values = [row["window_start"][:19], *(row[d] for d in dims), row["requests"], row["allowed"],
+                  row["blocked"], row["errors"], latency.get("p50", "-"), latency.get("p90", "-"), latency.get("p99", "-")]
+        print("  ".join(str(v).ljust(24 if c in ("window_start", "caller") else 12) for c, v in zip(columns, values)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll up API Gateway access logs per time window and caller.")
+    parser.add_argument("paths", nargs="*", default=["-"], help="log files (.gz ok); - or nothing reads stdin")
+    parser.add_argument("--window", type=int, default=60, help="rollup window in seconds")
+    parser.add_argument("--by", default="ip", help=f"comma-separated dimensions to group by: {', '.join(DIMENSIONS)}")
+    parser.add_argument("--top", type=int, help="only the N busiest callers of each window")
+    parser.add_argument("--max-keys", type=int, default=10000, help="callers tracked per window; the rest go to (other)")
+    parser.add_argument("--open-windows", type=int, default=2, help="windows kept open for out-of-order lines")
+    parser.add_argument("--format", choices=("jsonl", "table"), default="jsonl", help="output format")
+    args = parser.parse_args()
+
+    dims = tuple(d.strip() for d in args.by.split(","))
+    unknown = [d for d in dims if d not in DIMENSIONS]
+    if unknown or args.window <= 0 or args.open_windows <= 0:
+        parser.error(f"invalid --by {unknown}" if unknown else "--window and --open-windows must be positive")
+
+    totals = {}
+    rows = analyze(read_lines(args.paths), args.window, dims, args.max_keys, args.open_windows, args.top, totals)
+    if args.format == "table":
+        print_table(rows, dims)
+    else:
+        for row in rows:
+            sys.stdout.write(json.dumps(row) + "\n")
+    print(json.dumps({"summary": totals}), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
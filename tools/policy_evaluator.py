@@ -0,0 +1,370 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Offline prediction of what the scanner will see: for a caller (VPC, source IP, security group,
+# SigV4 or not, API key or not, target API) it walks the same checks as a real request - the VPC
+# endpoint's security group, the endpoint policy, IAM authorization, the API's resource policy and
+# the API key - and returns the scanner's verdict and enforcement point, e.g. ("Blocked", "API Gateway").
+#
+#   python3 tools/policy_evaluator.py                                  # the workshop's callers
+#   python3 tools/policy_evaluator.py --check /var/log/workshop-scanner/results.jsonl
+#   python3 tools/policy_evaluator.py --matrix 100000 --seed 1         # synthetic callers
+#
+# The network model is tools/network.yml; policies and CIDRs come from config.yml. Every CIDR in
+# the policies and security groups is compiled into sorted interval indexes: membership is a
+# bisect, and the address space is cut into intervals whose addresses all get the same decision.
+# For each combination of everything but the address (VPC, API, security group, credentials) the
+# decisions of all intervals are computed once into a table, so a caller costs one bisect and one
+# list lookup.
+
+import argparse
+import bisect
+import fnmatch
+import ipaddress
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, namedtuple
+
+import yaml
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+ALLOWED = ("Allowed", "-")
+BLOCKED_SG = ("Blocked", "Security Group")
+BLOCKED_VPCE = ("Blocked", "VPC endpoint")
+BLOCKED_APIGW = ("Blocked", "API Gateway")
+
+# ip is an address, a CIDR (every address in it is evaluated) or an int
+Caller = namedtuple("Caller", ["vpc", "ip", "security_group", "api", "signed", "api_key", "principal"])
+Caller.__new__.__defaults__ = (None,)
+
+def ip_to_int(ip):
+    if isinstance(ip, int):
+        return ip
+    parts = ip.split(".")
+    # fast path for dotted quads; anything else goes through ipaddress for validation
+    if len(parts) == 4 and all(p.isdigit() and len(p) <= 3 for p in parts):
+        a, b, c, d = map(int, parts)
+        if a < 256 and b < 256 and c < 256 and d < 256:
+            return a << 24 | b << 16 | c << 8 | d
+    address = ipaddress.ip_address(ip)
+    if address.version != 4:
+        raise ValueError(f"Only IPv4 is supported: {ip}")
+    return int(address)
+
+def cidr_range(cidr):
+    network = ipaddress.ip_network(cidr, strict=False)
+    if network.version != 4:
+        raise ValueError(f"Only IPv4 is supported: {cidr}")
+    return int(network.network_address), int(network.broadcast_address)
+
+class IntervalIndex:
+    # CIDRs merged into sorted, non-overlapping [start, end] ranges; `ip in index` is one bisect
+
+    def __init__(self, cidrs):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(cidr_range(c) for c in cidrs):
+            if self.ends and start <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __contains__(self, ip):
+        i = bisect.bisect_right(self.starts, ip) - 1
+        return i >= 0 and ip <= self.ends[i]
+
+    def boundaries(self):
+        for start, end in zip(self.starts, self.ends):
+            yield start
+            yield end + 1
+
+def _as_list(value):
+    return value if isinstance(value, list) else [value]
+
+class Condition:
+
+    IP_OPERATORS = ("IpAddress", "NotIpAddress")
+    STRING_OPERATORS = ("StringEquals", "StringNotEquals", "StringLike", "StringNotLike", "ArnEquals", "ArnNotEquals", "ArnLike", "ArnNotLike")
+
+    def __init__(self, operator, key, values):
+        if operator not in self.IP_OPERATORS + self.STRING_OPERATORS:
+            raise ValueError(f"Unsupported condition operator {operator}")
+        self.key = key.lower()
+        self.negated = "Not" in operator
+        values = _as_list(values)
+        if operator in self.IP_OPERATORS:
+            self.index = IntervalIndex(values)
+            self.test = self.index.__contains__
+        elif operator.endswith("Like"):
+            self.index = None
+            self.test = lambda value: any(fnmatch.fnmatchcase(value, v) for v in values)
+        else:
+            self.index = None
+            self.test = set(values).__contains__
+
+    def matches(self, context):
+        value = context.get(self.key)
+        # like IAM, a key missing from the request only satisfies the negated operators
+        if value is None:
+            return self.negated
+        return self.test(value) != self.negated
+
+class Statement:
+
+    def __init__(self, statement):
+        for unsupported in ("NotPrincipal", "NotAction", "NotResource"):
+            if unsupported in statement:
+                raise ValueError(f"{unsupported} is not supported")
+        self.effect = statement["Effect"]
+        principal = statement.get("Principal", "*")
+        if principal == "*" or (isinstance(principal, dict) and principal.get("AWS") == "*"):
+            self.principals = None
+        else:
+            self.principals = _as_list(principal.get("AWS", []))
+        self.actions = [a.lower() for a in _as_list(statement.get("Action", "*"))]
+        self.resources = _as_list(statement.get("Resource", "*"))
+        self.conditions = [Condition(operator, key, values)
+                           for operator, keys in statement.get("Condition", {}).items()
+                           for key, values in keys.items()]
+
+    def matches(self, context, action, resource):
+        if self.principals is not None:
+            principal = context.get("aws:principalarn")
+            if principal is None or not any(fnmatch.fnmatchcase(principal, p) for p in self.principals):
+                return False
+        return (any(fnmatch.fnmatchcase(action, a) for a in self.actions)
+                and any(fnmatch.fnmatchcase(resource, r) for r in self.resources)
+                and all(c.matches(context) for c in self.conditions))
+
+class Policy:
+
+    def __init__(self, document):
+        if isinstance(document, str):
+            document = json.loads(document)
+        self.statements = [Statement(s) for s in _as_list(document["Statement"])]
+
+    def allows(self, context, action, resource):
+        # explicit deny > allow > implicit deny
+        allowed = False
+        for statement in self.statements:
+            if statement.matches(context, action, resource):
+                if statement.effect == "Deny":
+                    return False
+                allowed = True
+        return allowed
+
+    def indexes(self):
+        return [c.index for s in self.statements for c in s.conditions if c.index is not None]
+
+class Evaluator:
+
+    def __init__(self, network, max_tables=4096):
+        self.apis = {}
+        for name, api in network["apis"].items():
+            self.apis[name] = {
+                "policy": Policy(api["resource_policy"]) if api.get("resource_policy") else None,
+                "api_key_required": api.get("api_key_required", False),
+                "iam": api.get("authorization", "none") == "iam",
+            }
+        self.vpcs = {}
+        for name, vpc in network["vpcs"].items():
+            ingress = vpc.get("endpoint_ingress", [])
+            self.vpcs[name] = {
+                "endpoint_id": vpc.get("endpoint_id"),
+                "vpc_id": vpc.get("vpc_id", name),
+                "ingress_cidrs": IntervalIndex([r["cidr"] for r in ingress if "cidr" in r]),
+                "ingress_groups": {r["security_group"] for r in ingress if "security_group" in r},
+                "policy": Policy(vpc["endpoint_policy"]) if vpc.get("endpoint_policy") else None,
+            }
+
+        # every address between two consecutive boundaries gets the same decision
+        indexes = [v["ingress_cidrs"] for v in self.vpcs.values()]
+        for policy in [a["policy"] for a in self.apis.values()] + [v["policy"] for v in self.vpcs.values()]:
+            if policy is not None:
+                indexes.extend(policy.indexes())
+        self.boundaries = sorted({0, *(b for index in indexes for b in index.boundaries())})
+        self.tables = {}
+        self.max_tables = max_tables
+
+    def intervals(self, cidr):
+        # the decision intervals overlapping a CIDR, as their first addresses
+        start, end = cidr_range(cidr)
+        first = bisect.bisect_right(self.boundaries, start) - 1
+        last = bisect.bisect_right(self.boundaries, end) - 1
+        return [start] + self.boundaries[first + 1:last + 1]
+
+    def evaluate(self, caller):
+        # Returns (verdict, enforced_at). A caller whose ip is a CIDR spanning addresses with
+        # different decisions gets ("Mixed", ...) listing them.
+        if isinstance(caller.ip, str) and "/" in caller.ip:
+            decisions = {self.decide(caller, ip) for ip in self.intervals(caller.ip)}
+            if len(decisions) == 1:
+                return decisions.pop()
+            return "Mixed", "; ".join(f"{v} @ {e}" for v, e in sorted(decisions))
+        return self.decide(caller, ip_to_int(caller.ip))
+
+    def table(self, vpc, security_group, api, signed, api_key, principal):
+        # the decision of every interval (in self.boundaries order) for one combination
+        key = (vpc, security_group, api, signed, api_key, principal)
+        table = self.tables.get(key)
+        if table is None:
+            if len(self.tables) >= self.max_tables:
+                self.tables.clear()
+            table = self.tables[key] = [self._evaluate(vpc, start, security_group, api, signed, api_key, principal)
+                                        for start in self.boundaries]
+        return table
+
+    def decide(self, caller, ip):
+        signed = bool(caller.signed)
+        table = self.table(caller.vpc, caller.security_group, caller.api, signed, bool(caller.api_key),
+                           caller.principal if signed else None)
+        return table[bisect.bisect_right(self.boundaries, ip) - 1]
+
+    def evaluate_all(self, callers):
+        # evaluate() for each caller, in order; callers with an integer ip cost one dict lookup
+        # (their decision table) and one bisect
+        boundaries = self.boundaries
+        find = bisect.bisect_right
+        tables = {}
+        for caller in callers:
+            vpc, ip, security_group, api, signed, api_key, principal = caller
+            if not isinstance(ip, int):
+                yield self.evaluate(caller)
+                continue
+            key = (vpc, security_group, api, signed, api_key, principal)
+            table = tables.get(key)
+            if table is None:
+                signed = bool(signed)
+                table = tables[key] = self.table(vpc, security_group, api, signed, bool(api_key),
+                                                 principal if signed else None)
+            yield table[find(boundaries, ip) - 1]
+
+    def _evaluate(self, vpc_name, ip, security_group, api_name, signed, api_key, principal):
+        vpc = self.vpcs[vpc_name]
+        api = self.apis[api_name]
+        if ip not in vpc["ingress_cidrs"] and security_group not in vpc["ingress_groups"]:
+            return BLOCKED_SG
+
+        context = {
+            "aws:vpcsourceip": ip,
+            "aws:sourcevpce": vpc["endpoint_id"],
+            "aws:sourcevpc": vpc["vpc_id"],
+            "aws:principalarn": principal,
+        }
+        action = "execute-api:invoke"
+        resource = f"arn:aws:execute-api:*:*:{api_name}/*"
+        if vpc["policy"] is not None and not vpc["policy"].allows(context, action, resource):
+            return BLOCKED_VPCE
+        if api["iam"] and not signed:
+            return BLOCKED_APIGW
+        if api["policy"] is not None and not api["policy"].allows(context, action, resource):
+            return BLOCKED_APIGW
+        if api["api_key_required"] and not api_key:
+            return BLOCKED_APIGW
+        return ALLOWED
+
+def resolve(value, config):
+    # "config:<key>" values are looked up in config.yml, recursively through lists and dicts
+    if isinstance(value, str) and value.startswith("config:"):
+        return config[value[len("config:"):]]
+    if isinstance(value, dict):
+        return {k: resolve(v, config) for k, v in value.items()}
+    if isinstance(value, list):
+        return [resolve(v, config) for v in value]
+    return value
+
+def load_network(network_path, config_path):
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+    with open(network_path) as f:
+        return resolve(yaml.safe_load(f), config)
+
+def caller_from(entry):
+    return Caller(entry["vpc"], str(entry["ip"]), entry.get("security_group"), entry["api"],
+                  entry.get("signed", False), entry.get("api_key", False), entry.get("principal"))
+
+def synthetic_callers(network, count, seed=0):
+    # random callers over every VPC, subnet address, security group and credential combination
+    rng = random.Random(seed)
+    vpcs = [(name, *cidr_range(v["cidr"])) for name, v in network["vpcs"].items()]
+    groups = sorted({c.get("security_group") for c in network.get("callers", [])} - {None}) or ["default"]
+    apis = list(network["apis"])
+    for _ in range(count):
+        vpc, start, end = rng.choice(vpcs)
+        signed = rng.random() < 0.5
+        yield Caller(vpc, rng.randint(start, end), rng.choice(groups), rng.choice(apis),
+                     signed, rng.random() < 0.5, f"arn:aws:iam::111111111111:role/Role{rng.randint(0, 9)}" if signed else None)
+
+def check(evaluator, network, results_path):
+    # Compares the scanner's recorded verdicts (scanner.py --output-file, JSONL) with the predictions
+    callers = {}
+    for entry in network.get("callers", []):
+        for key in ("check", "caller"):
+            if key in entry:
+                callers[entry[key]] = caller_from(entry)
+
+    counts = Counter()
+    with open(results_path) as f:
+        for line in f:
+            record = json.loads(line)
+            caller = callers.get(record["caller"]) or callers.get(record["check"])
+            if caller is None:
+                counts["unknown caller"] += 1
+                continue
+            predicted = evaluator.evaluate(caller)
+            # "Blocked?" is the scanner's inconclusive block
+            actual = (record["verdict"].rstrip("?"), record["enforced_at"])
+            if predicted == actual:
+                counts["match"] += 1
+            else:
+                counts["mismatch"] += 1
+                print(f"MISMATCH {record['check']} ({record['caller']}): predicted {predicted}, scanner saw {actual} at {record['timestamp']}")
+    print(json.dumps(dict(counts)))
+    return counts["mismatch"] == 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict allow/deny for callers of ServiceB's API from its policies and network config.")
+    parser.add_argument("--network", default=os.path.join(ROOT, "tools", "network.yml"), help="network model")
+    parser.add_argument("--config", default=os.path.join(ROOT, "config.yml"), help="config.yml with the policies and CIDRs")
+    parser.add_argument("--check", metavar="RESULTS", help="compare predictions with a scanner results file (JSONL)")
+    parser.add_argument("--matrix", type=int, metavar="N", help="evaluate N synthetic callers and summarize")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the synthetic callers")
+    parser.add_argument("--output", help="with --matrix, also write every caller's decision to this file (JSONL)")
+    args = parser.parse_args()
+
+    network = load_network(args.network, args.config)
+    evaluator = Evaluator(network)
+
+    if args.check:
+        sys.exit(0 if check(evaluator, network, args.check) else 1)
+
+    if args.matrix:
+        callers = list(synthetic_callers(network, args.matrix, args.seed))
+        out = open(args.output, "w") if args.output else None
+        start = time.perf_counter()
+        results = list(evaluator.evaluate_all(callers))
+        decisions = Counter(results)
+        elapsed = time.perf_counter() - start
+        if out:
+            for caller, decision in zip(callers, results):
+                record = dict(caller._asdict(), ip=str(ipaddress.IPv4Address(caller.ip)), verdict=decision[0], enforced_at=decision[1])
+                out.write(json.dumps(record) + "\n")
+        if out:
+            out.close()
+        for (verdict, enforced_at), count in decisions.most_common():
+            print(f"{verdict:<10}{enforced_at:<18}{count:>10}")
+        print(f"\n{len(callers)} callers in {elapsed * 1000:.1f} ms ({len(callers) / elapsed / 1000:.0f} per ms), "
+              f"{len(evaluator.tables)} decision tables of {len(evaluator.boundaries)} intervals")
+        return
+
+    for entry in network.get("callers", []):
+        verdict, enforced_at = evaluator.evaluate(caller_from(entry))
+        print(f"{entry.get('check', entry.get('caller')):<32}{verdict:<10}{enforced_at}")
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ from aws_cdk import (
     aws_events as events_,
     aws_events_targets as targets_,
     aws_s3 as s3_,
+    aws_s3_assets as s3_assets_,
     aws_logs as logs_,
 )
 
@@ -71,6 +72,27 @@ class ServiceAStack(cdk.Stack):
         service_b_secret.grant_read(main_instance_role)
         service_b_secret.grant_read(lambda_role)
 
+        # The instances' scripts read all the workshop parameters with one GetParametersByPath call
+        # (AmazonSSMManagedInstanceCore only allows GetParameter/GetParameters)
+        main_instance_role.add_to_policy(iam_.PolicyStatement(
+            effect=iam_.Effect.ALLOW,
+            actions=["ssm:GetParametersByPath"],
+            resources=[
+                cdk.Arn.format(cdk.ArnComponents(resource='parameter',service='ssm'),self)
+                +configs["params_path"].rstrip("/"),
+                cdk.Arn.format(cdk.ArnComponents(resource='parameter',service='ssm'),self)
+                +configs["params_path"]+"*"
+            ]
+        ))
+
+        # roles the scanner assumes to scan environments in other accounts (scanner.py --targets)
+        if configs["scanner_target_roles"]:
+            main_instance_role.add_to_policy(iam_.PolicyStatement(
+                effect=iam_.Effect.ALLOW,
+                actions=["sts:AssumeRole"],
+                resources=configs["scanner_target_roles"]
+            ))
+
         lambda_role.add_to_policy(iam_.PolicyStatement(
             effect=iam_.Effect.ALLOW,
             actions=["ssm:GetParameter*"],
@@ -174,6 +196,18 @@ class ServiceAStack(cdk.Stack):
             description="The layer containing external packages used in this workshop.",
         )
 
+        # settings of the layer's shared modules (metrics.py, aws_clients.py), the same for every function
+        layer_env = {
+            "metrics_enabled":str(configs["metrics_enabled"]).lower(),
+            "metrics_namespace":configs["metrics_namespace"],
+            "aws_client_pool_size":str(configs["aws_client_pool_size"]),
+            "aws_client_retry_mode":configs["aws_client_retry_mode"],
+            "aws_client_max_attempts":str(configs["aws_client_max_attempts"]),
+            "aws_client_connect_timeout":str(configs["aws_client_connect_timeout"]),
+            "aws_client_read_timeout":str(configs["aws_client_read_timeout"]),
+            "aws_client_tcp_keepalive":str(configs["aws_client_tcp_keepalive"]).lower()
+        }
+
         caller1_lambda = lambda_.Function(self,"CallerOne",
             runtime=lambda_.Runtime.PYTHON_3_8,
 
@@ -190,7 +224,13 @@ class ServiceAStack(cdk.Stack):
                 "api_resource":configs["api_resource"],
                 "api_region": cdk.Stack.of(self).region,
                 "api_id_parameter":f'{configs["params_path"]}service-b-api-id',
-                "api_secret_parameter":f'{configs["params_path"]}service-b-api-secret-arn'
+                "api_secret_parameter":f'{configs["params_path"]}service-b-api-secret-arn',
+                "cache_ttl":str(configs["caller_cache_ttl"]),
+                "refresh_min_interval":str(configs["caller_refresh_min_interval"]),
+                "connect_timeout":str(configs["caller_connect_timeout"]),
+                "read_timeout":str(configs["caller_read_timeout"]),
+                "get_retries":str(configs["caller_get_retries"]),
+                **layer_env
             }
         )
 
@@ -210,7 +250,13 @@ class ServiceAStack(cdk.Stack):
                 "api_resource":configs["api_resource"],
                 "api_region": cdk.Stack.of(self).region,
                 "api_id_parameter":f'{configs["params_path"]}service-b-api-id',
-                "api_secret_parameter":f'{configs["params_path"]}service-b-api-secret-arn'
+                "api_secret_parameter":f'{configs["params_path"]}service-b-api-secret-arn',
+                "cache_ttl":str(configs["caller_cache_ttl"]),
+                "refresh_min_interval":str(configs["caller_refresh_min_interval"]),
+                "connect_timeout":str(configs["caller_connect_timeout"]),
+                "read_timeout":str(configs["caller_read_timeout"]),
+                "get_retries":str(configs["caller_get_retries"]),
+                **layer_env
             },
         )
 
@@ -230,7 +276,13 @@ class ServiceAStack(cdk.Stack):
                 "api_resource":configs["api_resource"],
                 "api_region": cdk.Stack.of(self).region,
                 "api_id_parameter":f'{configs["params_path"]}service-b-api-id',
-                "api_secret_parameter":f'{configs["params_path"]}service-b-api-secret-arn'
+                "api_secret_parameter":f'{configs["params_path"]}service-b-api-secret-arn',
+                "cache_ttl":str(configs["caller_cache_ttl"]),
+                "refresh_min_interval":str(configs["caller_refresh_min_interval"]),
+                "connect_timeout":str(configs["caller_connect_timeout"]),
+                "read_timeout":str(configs["caller_read_timeout"]),
+                "get_retries":str(configs["caller_get_retries"]),
+                **layer_env
             }
         )
 
@@ -241,8 +293,10 @@ class ServiceAStack(cdk.Stack):
 
             timeout=cdk.Duration.seconds(configs["lambda_timeout"]),
             handler="lambda_function.lambda_handler",
+            layers=[lambda_layer],
             environment= {
-                "region": cdk.Stack.of(self).region
+                "region": cdk.Stack.of(self).region,
+                **layer_env
             },
         )
         gd_lambda.role.add_to_policy(iam_.PolicyStatement(
@@ -280,6 +334,24 @@ class ServiceAStack(cdk.Stack):
         )
 
         # EC2 stuff
+        # the scanner and caller scripts: zipped from ./src/ec2/curl-pkg in dev mode (following its
+        # symlinks to the layer's modules), otherwise curl-pkg.zip built the same way and uploaded
+        # next to the lambdas' code
+        if configs["dev_mode"]:
+            curl_pkg = s3_assets_.Asset(self,"CurlPkg",
+                path="./src/ec2/curl-pkg",
+                follow_symlinks=cdk.SymlinkFollowMode.ALWAYS
+            )
+            curl_pkg.grant_read(main_instance_role)
+            curl_pkg_url = curl_pkg.s3_object_url
+        else:
+            curl_pkg_key = f"{assets_prefix}ec2/curl-pkg/curl-pkg.zip"
+            code_bucket.grant_read(main_instance_role, curl_pkg_key)
+            curl_pkg_url = code_bucket.s3_url_for_object(curl_pkg_key)
+        instance_user_data = (ec2_user_data
+            .replace("__CURL_PKG_REGION__", cdk.Stack.of(self).region)
+            .replace("__CURL_PKG_S3_URL__", curl_pkg_url))
+
         amzn_linux_ami = ec2_.MachineImage.latest_amazon_linux(
             generation=ec2_.AmazonLinuxGeneration.AMAZON_LINUX_2,
             edition=ec2_.AmazonLinuxEdition.STANDARD,
@@ -296,14 +368,20 @@ class ServiceAStack(cdk.Stack):
             vpc_subnets=ec2_.SubnetSelection(subnets=[main_vpc.private_subnets[0]]),
             security_group=main_instance_secgroup,
             role=main_instance_role,
-            user_data=ec2_.UserData.custom(ec2_user_data)
+            user_data=ec2_.UserData.custom(instance_user_data)
         )
         main_instance.add_user_data(f'echo api_resource={configs["api_resource"]} >> /tmp/workshop/.env')
         main_instance.add_user_data(f'echo api_region={cdk.Stack.of(self).region} >> /tmp/workshop/.env')
         main_instance.add_user_data(f'echo api_id_parameter={configs["params_path"]}service-b-api-id >> /tmp/workshop/.env')
         main_instance.add_user_data(f'echo api_secret_parameter={configs["params_path"]}service-b-api-secret-arn >> /tmp/workshop/.env')
+        main_instance.add_user_data(f'echo params_path={configs["params_path"]} >> /tmp/workshop/.env')
+        main_instance.add_user_data(f'echo connect_timeout={configs["caller_connect_timeout"]} >> /tmp/workshop/.env')
+        main_instance.add_user_data(f'echo read_timeout={configs["caller_read_timeout"]} >> /tmp/workshop/.env')
+        main_instance.add_user_data(f'echo get_retries={configs["caller_get_retries"]} >> /tmp/workshop/.env')
+        main_instance.add_user_data(f'echo refresh_min_interval={configs["caller_refresh_min_interval"]} >> /tmp/workshop/.env')
         main_instance.add_user_data(f'echo unwanted_callers_parameter={configs["params_path"]}service-a-unwanted-callers-list >> /tmp/workshop/.env')
         main_instance.add_user_data(f'echo unknown_api_id_parameter={configs["params_path"]}unknown-api-id >> /tmp/workshop/.env')
+        main_instance.add_user_data('systemctl enable --now workshop-scanner')
         
         other_instance = ec2_.Instance(self,"OtherInstance",
             instance_type=ec2_.InstanceType(configs["instance_type"]),
@@ -311,12 +389,17 @@ class ServiceAStack(cdk.Stack):
             vpc=vpc2,
             vpc_subnets=ec2_.SubnetSelection(subnets=[vpc2.private_subnets[0]]),
             role=main_instance_role,
-            user_data=ec2_.UserData.custom(ec2_user_data)
+            user_data=ec2_.UserData.custom(instance_user_data)
         )
         other_instance.add_user_data(f'echo api_resource={configs["api_resource"]} >> /tmp/workshop/.env')
         other_instance.add_user_data(f'echo api_region={cdk.Stack.of(self).region} >> /tmp/workshop/.env')
         other_instance.add_user_data(f'echo api_id_parameter={configs["params_path"]}service-b-api-id >> /tmp/workshop/.env')
         other_instance.add_user_data(f'echo api_secret_parameter={configs["params_path"]}service-b-api-secret-arn >> /tmp/workshop/.env')
+        other_instance.add_user_data(f'echo params_path={configs["params_path"]} >> /tmp/workshop/.env')
+        other_instance.add_user_data(f'echo connect_timeout={configs["caller_connect_timeout"]} >> /tmp/workshop/.env')
+        other_instance.add_user_data(f'echo read_timeout={configs["caller_read_timeout"]} >> /tmp/workshop/.env')
+        other_instance.add_user_data(f'echo get_retries={configs["caller_get_retries"]} >> /tmp/workshop/.env')
+        other_instance.add_user_data(f'echo refresh_min_interval={configs["caller_refresh_min_interval"]} >> /tmp/workshop/.env')
 
         # This is for workshop purpose only - to enable scanner to invoke Lambdas and unwanted instance
         caller1_lambda.grant_invoke(main_instance_role)
@@ -324,7 +407,7 @@ class ServiceAStack(cdk.Stack):
         caller3_lambda.grant_invoke(main_instance_role)
         main_instance_role.add_to_policy(iam_.PolicyStatement(
             resources=["*"],
-            actions=["ssm:SendCommand","ssm:ListCommandInvocations"]
+            actions=["ssm:SendCommand","ssm:ListCommandInvocations","ssm:DescribeInstanceInformation"]
         ))
 
         # Storing in Systems Manager Paramete Store
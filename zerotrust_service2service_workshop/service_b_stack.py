@@ -1,6 +1,7 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import json
 import yaml
 
 from aws_cdk import core as cdk
@@ -36,6 +37,27 @@ class ServiceBStack(cdk.Stack):
                 bucket_name=assets_bucket
             )
         
+        # shared modules (metrics.py, ...); same code as ServiceAStack's layer
+        lambda_layer = lambda_.LayerVersion(self,"WorkshopLayer",
+
+            code=(lambda_.Code.from_asset("./src/lambda/layer") if configs["dev_mode"] else lambda_.Code.from_bucket(code_bucket,f"{assets_prefix}lambda/layer/lambda-code.zip")),
+
+            compatible_runtimes=[lambda_.Runtime.PYTHON_3_8],
+            description="The layer containing external packages used in this workshop.",
+        )
+
+        # settings of the layer's shared modules (metrics.py, aws_clients.py), the same for every function
+        layer_env = {
+            "metrics_enabled":str(configs["metrics_enabled"]).lower(),
+            "metrics_namespace":configs["metrics_namespace"],
+            "aws_client_pool_size":str(configs["aws_client_pool_size"]),
+            "aws_client_retry_mode":configs["aws_client_retry_mode"],
+            "aws_client_max_attempts":str(configs["aws_client_max_attempts"]),
+            "aws_client_connect_timeout":str(configs["aws_client_connect_timeout"]),
+            "aws_client_read_timeout":str(configs["aws_client_read_timeout"]),
+            "aws_client_tcp_keepalive":str(configs["aws_client_tcp_keepalive"]).lower()
+        }
+
         orders_table = ddb_.Table(self,"OrdersTable",
             partition_key=ddb_.Attribute(
                 name="order_id",
@@ -51,9 +73,11 @@ class ServiceBStack(cdk.Stack):
             code=(lambda_.Code.from_asset("./src/lambda/ddbinit") if configs["dev_mode"] else lambda_.Code.from_bucket(code_bucket,f"{assets_prefix}lambda/ddbinit/lambda-code.zip")),
             
             handler="lambda_function.lambda_handler",
+            layers=[lambda_layer],
             timeout=cdk.Duration.seconds(configs["lambda_timeout"]),
             environment={
-                "TABLE_NAME":orders_table.table_name
+                "TABLE_NAME":orders_table.table_name,
+                **layer_env
             }
         )
         orders_table.grant_write_data(ddbinit_lambda)
@@ -61,6 +85,10 @@ class ServiceBStack(cdk.Stack):
         # NICE to have: alternative to custom resource, to reduce stack creation time
         ddb_init = cdk.CustomResource(self,"DDBInit",
             service_token=ddbinit_lambda.function_arn,
+            properties={
+                "SeedCount":configs["seed_order_count"],
+                "Seed":configs["seed_order_seed"]
+            }
         )
 
         backend_lambda = lambda_.Function(self,"BackendLambda",
@@ -69,9 +97,14 @@ class ServiceBStack(cdk.Stack):
             code=(lambda_.Code.from_asset("./src/lambda/backend") if configs["dev_mode"] else lambda_.Code.from_bucket(code_bucket,f"{assets_prefix}lambda/backend/lambda-code.zip")),
 
             handler="lambda_function.lambda_handler",
+            layers=[lambda_layer],
             timeout=cdk.Duration.seconds(configs["lambda_timeout"]),
             environment={
-                "TABLE_NAME":orders_table.table_name
+                "TABLE_NAME":orders_table.table_name,
+                "SCAN_SEGMENTS":str(configs["backend_scan_segments"]),
+                "CACHE_TTL":str(configs["backend_cache_ttl"]),
+                "PAGE_SIZE":str(configs["backend_page_size"]),
+                **layer_env
             }
         )
 
@@ -95,6 +128,29 @@ class ServiceBStack(cdk.Stack):
             removal_policy=cdk.RemovalPolicy.DESTROY
         )
 
+        # JSON access logs add the latency, VPC endpoint and caller identity (see tools/access_log_analyzer.py)
+        if configs["api_access_log_format"] == "json":
+            access_log_format = apigw_.AccessLogFormat.custom(json.dumps({
+                "requestId": "$context.requestId",
+                "ip": "$context.identity.sourceIp",
+                "caller": "$context.identity.caller",
+                "user": "$context.identity.user",
+                "userArn": "$context.identity.userArn",
+                "apiKeyId": "$context.identity.apiKeyId",
+                "vpceId": "$context.identity.vpceId",
+                "requestTime": "$context.requestTime",
+                "requestTimeEpoch": "$context.requestTimeEpoch",
+                "httpMethod": "$context.httpMethod",
+                "resourcePath": "$context.resourcePath",
+                "protocol": "$context.protocol",
+                "status": "$context.status",
+                "responseLength": "$context.responseLength",
+                "responseLatency": "$context.responseLatency",
+                "integrationLatency": "$context.integrationLatency",
+            }))
+        else:
+            access_log_format = apigw_.AccessLogFormat.clf()
+
         api = apigw_.LambdaRestApi(self,"ServiceBAPI",
             endpoint_configuration={
                 "types":[apigw_.EndpointType.PRIVATE]
@@ -102,12 +158,14 @@ class ServiceBStack(cdk.Stack):
             deploy_options={
                 "stage_name":"api",
                 "access_log_destination":apigw_.LogGroupLogDestination(access_log_group) ,
-                "access_log_format": apigw_.AccessLogFormat.clf()
+                "access_log_format": access_log_format
             },
             default_method_options={
                 "api_key_required": True
             },
             policy= iam_.PolicyDocument.from_json(configs["api_resource_policy"]),
+            # gzip responses of at least this many bytes for clients sending Accept-Encoding: gzip
+            minimum_compression_size=configs["api_min_compression_size"],
             handler=backend_lambda,
             proxy=False
         )
@@ -125,6 +183,12 @@ class ServiceBStack(cdk.Stack):
         orders = api.root.add_resource("orders")
         get_orders = orders.add_method("GET")
 
+        # Key-based lookups; these inherit the API key requirement and resource policy of the API
+        order = orders.add_resource("{order_id}")
+        order.add_method("GET")
+        orders_batch = orders.add_resource("batch")
+        orders_batch.add_method("POST")
+
         # For workshop purpose only - this is to determine when calls get blocked at API GW in the scanner.py
         api.add_gateway_response("APICustomResponse",
             type=apigw_.ResponseType.DEFAULT_4_XX,
@@ -169,35 +233,77 @@ class ServiceBStack(cdk.Stack):
         )
 
 
-        # CloudWatch dashboard for API GW
+        # CloudWatch dashboard for API GW, the backend Lambda and the orders table, with alarms;
+        # the widgets and alarms are listed in config.yml (dashboard_widgets, dashboard_alarms)
+        period = cdk.Duration.minutes(configs["dashboard_period_minutes"])
+        metric_sources = {
+            "api": ("AWS/ApiGateway", {"ApiName": api.rest_api_name}),
+            "backend": ("AWS/Lambda", {"FunctionName": backend_lambda.function_name}),
+            "orders_table": ("AWS/DynamoDB", {"TableName": orders_table.table_name}),
+        }
+
+        def dashboard_metric(source, metric_name, statistic, label=None):
+            namespace, dimensions = metric_sources[source]
+            return cw_.Metric(
+                metric_name=metric_name,
+                label=label,
+                namespace=namespace,
+                dimensions=dimensions,
+                statistic=statistic,
+                period=period
+            )
+
+        alarms = []
+        for alarm in configs["dashboard_alarms"]:
+            alarms.append(cw_.Alarm(self,alarm["name"],
+                metric=dashboard_metric(alarm["source"], alarm["metric"], alarm["statistic"]),
+                threshold=alarm["threshold"],
+                evaluation_periods=alarm["periods"],
+                datapoints_to_alarm=alarm["datapoints"],
+                comparison_operator=cw_.ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+                # no traffic (e.g. no throttles reported) is not a breach
+                treat_missing_data=cw_.TreatMissingData.NOT_BREACHING,
+                alarm_description=alarm.get("description")
+            ))
+
         dashboard = cw_.Dashboard(self,"APICallsDashboard",
             start="-PT2H",
         )
 
-        dashboard.add_widgets(cw_.GraphWidget(
-            title="Number of API Calls",
-            left=[
-                cw_.Metric(
-                    metric_name="Count",
-                    label="Total API Calls",
-                    namespace="AWS/ApiGateway",
-                    dimensions={"ApiName": api.rest_api_name},
-                    statistic="SampleCount"
+        widgets = []
+        for widget in configs["dashboard_widgets"]:
+            metrics = []
+            for metric in widget["metrics"]:
+                statistics = metric["statistic"] if isinstance(metric["statistic"], list) else [metric["statistic"]]
+                for statistic in statistics:
+                    label = metric.get("label", metric["metric"])
+                    metrics.append(dashboard_metric(metric["source"], metric["metric"], statistic,
+                        f'{label} {statistic}' if len(statistics) > 1 else label))
+            widgets.append(cw_.GraphWidget(
+                title=widget["title"],
+                left=metrics,
+                left_y_axis=cw_.YAxisProps(
+                    min= 0
                 ),
-                cw_.Metric(
-                    metric_name="4XXError",
-                    label="Unauthorized Calls",
-                    namespace="AWS/ApiGateway",
-                    dimensions={"ApiName": api.rest_api_name},
-                    statistic="Sum"
-                )
-            ],
-            left_y_axis=cw_.YAxisProps(
-                min= 0
-            ),
-            width=20,
-            period=cdk.Duration.minutes(1),
-        ))
+                width=widget.get("width", 12),
+                period=period,
+            ))
+        if alarms:
+            widgets.append(cw_.AlarmStatusWidget(
+                title="Alarms",
+                alarms=alarms,
+                width=24
+            ))
+
+        # widgets fill rows of 24 columns, left to right
+        row = []
+        for widget in widgets:
+            if row and sum(w.width for w in row) + widget.width > 24:
+                dashboard.add_widgets(*row)
+                row = []
+            row.append(widget)
+        if row:
+            dashboard.add_widgets(*row)
 
         cdk.CfnOutput(self,"APIMethodARN",
                         value=get_orders.method_arn